@@ -1,20 +1,53 @@
+import asyncio
+import contextvars
+import functools
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, validator
 import re
-from .scraper import extract_text_from_url
-from .detector import detect_fake_news
+from . import fetcher, metrics
+from .async_fetcher import close_async_client, configure_async_client, fetch_page_async
+from . import scraper
+from .scraper import extract_text_from_html
+from . import detector
+from .detector import detect_fake_news, detector_stats
+from .structured_logging import configure_logging, new_request_id, parse_sample_rates, request_id_var
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Log records are queued and written by a background thread, stamped with the request id
+configure_logging(
+    level=os.environ.get('TRUTHSCAN_LOG_LEVEL', 'INFO'),
+    fmt=os.environ.get('TRUTHSCAN_LOG_FORMAT', 'json'),
+    sample_rates=parse_sample_rates(os.environ.get('TRUTHSCAN_LOG_SAMPLE')),  # e.g. "backend.extractor=0.1"
+)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Fake News Detection API")
 
+# Outbound connection limits and timeouts for page downloads
+configure_async_client(
+    max_connections=int(os.environ.get('TRUTHSCAN_MAX_CONNECTIONS', 100)),
+    max_keepalive_connections=int(os.environ.get('TRUTHSCAN_MAX_KEEPALIVE', 20)),
+    connect_timeout=float(os.environ.get('TRUTHSCAN_CONNECT_TIMEOUT', 5)),
+    read_timeout=float(os.environ.get('TRUTHSCAN_READ_TIMEOUT', 15)),
+)
+fetcher.configure_download(max_bytes=int(os.environ.get('TRUTHSCAN_PAGE_MAX_BYTES', 5 * 1024 * 1024)))
+
+# Parsing and scoring are CPU-bound, they run here so the event loop stays responsive
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('TRUTHSCAN_EXECUTOR_WORKERS', os.cpu_count() or 4)),
+    thread_name_prefix='verify'
+)
+
+# With a pre-forking server (e.g. gunicorn --preload) this runs once in the master,
+# and every worker shares the loaded weights instead of holding its own copy
+if os.environ.get('TRUTHSCAN_PRELOAD_MODEL') == '1':
+    detector.preload_model()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +57,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Time every request for the metrics, labelled with its route rather than the raw path, and tag its logs"""
+    started = time.perf_counter()
+    request_id = new_request_id(request.headers.get('X-Request-ID'))
+    token = request_id_var.set(request_id)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers['X-Request-ID'] = request_id
+        return response
+    finally:
+        request_id_var.reset(token)
+        route = request.scope.get('route')
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=getattr(route, 'path', 'other'),
+                                        method=request.method, status=str(status))
+
+def run_in_executor(func, *args):
+    """Run func on the verify executor, carrying over the request id for its log records"""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, func, *args))
+
 class VerificationRequest(BaseModel):
     text: Optional[str] = None
     url: Optional[str] = None
@@ -57,10 +113,41 @@ class VerificationResponse(BaseModel):
     confidence: float
     message: str
 
+@app.on_event("startup")
+async def startup():
+    # Load and exercise the model before the first request arrives
+    if detector.DETECTOR_MODE == 'model':
+        await asyncio.get_running_loop().run_in_executor(executor, detector.warmup)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_async_client()
+    executor.shutdown(wait=False)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Fake News Detection API"}
 
+@app.get("/fetch/stats")
+async def fetch_stats():
+    """Retry counters and circuit breaker state per host for this worker"""
+    return fetcher.retry_policy.stats()
+
+@app.get("/extract/stats")
+async def extract_stats():
+    """Runs, wins and time spent per extractor for this worker"""
+    return scraper.pipeline.stats()
+
+@app.get("/detector/stats")
+async def detector_stats_route():
+    """Detector mode, batch sizes, per-item latency and throughput for this worker"""
+    return detector_stats()
+
+@app.get("/metrics")
+async def metrics_route():
+    """Per-stage timings and counters of this worker in the Prometheus text format"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/verify", response_model=VerificationResponse)
 async def verify_news(request: VerificationRequest):
     try:
@@ -73,8 +160,13 @@ async def verify_news(request: VerificationRequest):
         # If URL is provided, scrape the text from the URL
         if request.url:
             try:
-                logger.debug(f"Extracting text from URL: {request.url}")
-                extracted_text = extract_text_from_url(request.url)
+                logger.debug("Extracting text from URL: %s", request.url)
+                try:
+                    page = await fetch_page_async(request.url)
+                    extracted_text = await run_in_executor(extract_text_from_html, page.body, request.url, page.encoding)
+                except Exception as e:
+                    logger.error("Error fetching URL: %s", e)
+                    extracted_text = None
                 if not extracted_text and not text_to_analyze:
                     raise HTTPException(
                         status_code=400, 
@@ -84,7 +176,7 @@ async def verify_news(request: VerificationRequest):
                 if extracted_text:
                     text_to_analyze = extracted_text
             except Exception as e:
-                logger.error(f"Error extracting text from URL: {str(e)}")
+                logger.error("Error extracting text from URL: %s", e)
                 raise HTTPException(
                     status_code=500, 
                     detail=f"Failed to process the URL: {str(e)}"
@@ -93,19 +185,19 @@ async def verify_news(request: VerificationRequest):
         # Detect fake news
         try:
             logger.debug("Analyzing text for fake news detection")
-            result, confidence, message = detect_fake_news(text_to_analyze)
+            result, confidence, message = await run_in_executor(detect_fake_news, text_to_analyze)
             return VerificationResponse(
                 result=result,
                 confidence=confidence,
                 message=message
             )
         except Exception as e:
-            logger.error(f"Error during fake news detection: {str(e)}")
+            logger.error("Error during fake news detection: %s", e)
             raise HTTPException(
                 status_code=500, 
                 detail=f"Error analyzing text: {str(e)}"
             )
             
     except Exception as e:
-        logger.error(f"Unexpected error in verify endpoint: {str(e)}")
+        logger.error("Unexpected error in verify endpoint: %s", e)
         raise HTTPException(status_code=500, detail="Failed to process the request")
@@ -0,0 +1,148 @@
+import asyncio
+import http.cookiejar
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from . import fetcher, metrics
+from .encoding import detect_encoding
+from .fetcher import (DEFAULT_HEADERS, DOWNLOAD_CHUNK_SIZE, FetchResult, UnsupportedContentError, cache_response,
+                      get_page_cache, host_key, is_html_content_type)
+
+logger = logging.getLogger(__name__)
+
+# Shared client, created on first use unless configure_async_client() was called
+_client: Optional[httpx.AsyncClient] = None
+_client_settings = {'max_connections': 100, 'max_keepalive_connections': 20, 'connect_timeout': 5.0, 'read_timeout': 15.0}
+
+
+def configure_async_client(max_connections: int = 100, max_keepalive_connections: int = 20,
+                           connect_timeout: float = 5.0, read_timeout: float = 15.0) -> None:
+    """
+    Set the connection limits and timeouts of the shared async client.
+    Takes effect the next time a client is created, see close_async_client().
+
+    Args:
+        max_connections: Maximum concurrent connections across all hosts
+        max_keepalive_connections: Idle connections kept open for reuse
+        connect_timeout: Seconds allowed to establish a connection
+        read_timeout: Seconds allowed between bytes of the response
+    """
+    _client_settings.update(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The shared async HTTP client, created with the current settings on first use; it keeps no cookies"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=_client_settings['max_connections'],
+                max_keepalive_connections=_client_settings['max_keepalive_connections'],
+            ),
+            timeout=httpx.Timeout(_client_settings['read_timeout'], connect=_client_settings['connect_timeout']),
+            follow_redirects=True,
+            cookies=http.cookiejar.CookieJar(policy=fetcher.no_cookie_policy()),
+        )
+    return _client
+
+
+async def close_async_client() -> None:
+    """Close the shared client and its connections, e.g. on application shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for download errors worth retrying: transport problems, timeouts, 5xx and 429 responses"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, httpx.TransportError)
+
+
+async def fetch_page_async(url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+    """
+    Async counterpart of fetcher.fetch_page, sharing its page cache, retry policy and circuit breakers.
+
+    Page cache reads and writes touch the disk, so they run in the default
+    executor; only the network I/O and the backoff waits run on the event loop.
+
+    Args:
+        url: The URL to fetch
+        headers: Request headers, DEFAULT_HEADERS if not given
+
+    Returns:
+        FetchResult for the page
+
+    Raises:
+        CircuitOpenError if the host is failing, UnsupportedContentError if the URL is not an HTML page,
+        otherwise httpx.HTTPError if the download fails or the server returns an error status
+    """
+    started = time.perf_counter()
+    try:
+        result = await fetcher.retry_policy.call_async(
+            lambda remaining: _fetch_once(url, headers, remaining),
+            host_key(url),
+            is_transient_error
+        )
+    except Exception:
+        metrics.FETCH_SECONDS.observe(time.perf_counter() - started, outcome='error')
+        raise
+    fetcher.observe_fetch(started, result)
+    return result
+
+
+async def _fetch_once(url: str, headers: Optional[Dict[str, str]], remaining: float) -> FetchResult:
+    """A single download attempt for fetch_page_async, bounded by the time left before the retry deadline"""
+    cache = get_page_cache()
+    cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+
+    request_headers = dict(headers or DEFAULT_HEADERS)
+    if cached is not None:
+        request_headers.update(cache.conditional_headers(cached))
+
+    remaining = max(0.1, remaining)
+    timeout = httpx.Timeout(min(_client_settings['read_timeout'], remaining),
+                            connect=min(_client_settings['connect_timeout'], remaining))
+    max_bytes = fetcher._download_settings['max_bytes']
+    chunks = []
+    size = 0
+    truncated = False
+    async with get_async_client().stream('GET', url, headers=request_headers, timeout=timeout) as response:
+        if response.status_code == 304 and cached is not None:
+            logger.debug("Page cache revalidated for %s", url)
+            await asyncio.to_thread(cache.touch, url)
+            return FetchResult(url=url, body=cached.body, content_type=cached.content_type,
+                               encoding=cached.encoding, from_cache=True)
+
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type')
+        if not is_html_content_type(content_type):
+            raise UnsupportedContentError(url, content_type)
+
+        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                truncated = True
+                break
+
+    body = b''.join(chunks)[:max_bytes]
+    if truncated:
+        logger.info("Stopped reading %s at %d bytes", url, max_bytes)
+    encoding, _ = detect_encoding(body, content_type)
+    if not truncated:
+        await asyncio.to_thread(cache_response, cache, url, body, response.headers, encoding)
+
+    return FetchResult(url=url, body=body, content_type=content_type, encoding=encoding, truncated=truncated)
@@ -0,0 +1,181 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Generic, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class _Request(Generic[T]):
+    __slots__ = ('item', 'length', 'future', 'arrived_at')
+
+    def __init__(self, item: T, length: int):
+        self.item = item
+        self.length = length
+        self.future: Future = Future()
+        self.arrived_at = time.perf_counter()
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Groups concurrent single-item calls into batches for one batched function.
+
+    Callers submit items from any thread and get a Future. A background thread
+    waits until max_batch_size items are queued or the oldest one has waited
+    max_wait_ms, then runs run_batch once over up to max_batch_size items and
+    resolves each Future with its own result. Batches are formed around the
+    oldest queued item from its neighbours in length, so items padded to a common
+    length in one forward pass are of similar size and none starves.
+    """
+
+    def __init__(self, run_batch: Callable[[List[T]], Sequence[R]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, length_of: Callable[[T], int] = len,
+                 name: str = 'batcher', latency_window: int = 10000):
+        """
+        Args:
+            run_batch: Processes a list of items, returning one result per item in the same order
+            max_batch_size: Most items passed to run_batch at once
+            max_wait_ms: Longest an item waits for others to share its batch
+            length_of: Size of an item, used to batch items of similar length
+            name: Name of the worker thread, for logs
+            latency_window: Most recent per-item latencies kept for stats()
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.length_of = length_of
+        self.name = name
+
+        self._pending: List[_Request] = []  # In arrival order
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._counters = {"items": 0, "batches": 0, "errors": 0, "busy_seconds": 0.0}
+        self._started_at = time.perf_counter()
+
+    def start(self) -> None:
+        """Start the worker thread; submit() does this on first use"""
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """Stop the worker once the queued items are processed"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, item: T) -> Future:
+        """Queue an item, returning a Future for its result"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        request = _Request(item, self.length_of(item))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            self._pending.append(request)
+            if len(self._pending) >= self.max_batch_size or len(self._pending) == 1:
+                self._condition.notify()
+        return request.future
+
+    def __call__(self, item: T, timeout: Optional[float] = None) -> R:
+        """Submit an item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def _next_batch(self) -> List[_Request]:
+        """Wait for a batch to fill or time out, then take it off the queue"""
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return []
+                self._condition.wait()
+            deadline = self._pending[0].arrived_at + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            if len(self._pending) <= self.max_batch_size:
+                batch, self._pending = self._pending, []
+                return batch
+
+            # Take the oldest request and its closest neighbours in length
+            oldest = self._pending[0]
+            by_length = sorted(self._pending, key=lambda request: request.length)
+            position = bisect.bisect_left([request.length for request in by_length], oldest.length)
+            start = max(0, min(position - self.max_batch_size // 2, len(by_length) - self.max_batch_size))
+            window = by_length[start:start + self.max_batch_size]
+            if not any(request is oldest for request in window):
+                # Ties in length: swap the oldest in for an item of the same length
+                window[position - start] = oldest
+            chosen = {id(request) for request in window}
+            batch = [request for request in self._pending if id(request) in chosen]
+            self._pending = [request for request in self._pending if id(request) not in chosen]
+            return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            batch.sort(key=lambda request: request.length)
+            started = time.perf_counter()
+            try:
+                results = self.run_batch([request.item for request in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"run_batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                logger.error("%s batch of %d failed: %s", self.name, len(batch), e)
+                with self._condition:
+                    self._counters["errors"] += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            with self._condition:
+                self._latencies.extend(finished - request.arrived_at for request in batch)
+                self._counters["items"] += len(batch)
+                self._counters["batches"] += 1
+                self._counters["busy_seconds"] += finished - started
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sizes, per-item latency percentiles and throughput since start"""
+        with self._condition:
+            counters = dict(self._counters)
+            queued = len(self._pending)
+            latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        elapsed = time.perf_counter() - self._started_at
+        return {
+            "items": counters["items"],
+            "batches": counters["batches"],
+            "errors": counters["errors"],
+            "queued": queued,
+            "mean_batch_size": round(counters["items"] / counters["batches"], 2) if counters["batches"] else 0.0,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+            "items_per_second": round(counters["items"] / elapsed, 2) if elapsed else 0.0,
+            "busy_fraction": round(counters["busy_seconds"] / elapsed, 4) if elapsed else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,109 @@
+import codecs
+import re
+from typing import Optional, Tuple
+
+from requests.compat import chardet
+
+# Byte order marks, longest first so UTF-32 is not mistaken for UTF-16
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# Bytes searched for a <meta charset>; the HTML spec puts the declaration in the first 1024
+META_SCAN_BYTES = 4096
+
+# Bytes handed to the statistical detector when nothing declares an encoding
+SNIFF_BYTES = 64 * 1024
+
+# Matches <meta charset="..."> as well as <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET_PATTERN = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.+-]+)', re.IGNORECASE)
+
+CONTENT_TYPE_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([^\s;"\']+)', re.IGNORECASE)
+
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """Canonical Python codec name for a declared charset, or None if Python does not know it"""
+    if not name:
+        return None
+    try:
+        encoding = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    # Pages labelled Latin-1 are practically always Windows-1252, browsers decode them that way too
+    return 'cp1252' if encoding in ('latin-1', 'iso8859-1', 'ascii') else encoding
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """The charset parameter of a Content-Type header, if it names a known encoding"""
+    if not content_type:
+        return None
+    match = CONTENT_TYPE_CHARSET_PATTERN.search(content_type)
+    return normalize_encoding(match.group(1)) if match else None
+
+
+def charset_from_bom(body: bytes) -> Optional[str]:
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return encoding
+    return None
+
+
+def charset_from_meta(body: bytes) -> Optional[str]:
+    """The encoding declared by a <meta> tag near the top of the page"""
+    match = META_CHARSET_PATTERN.search(body, 0, META_SCAN_BYTES)
+    if match is None:
+        return None
+    encoding = normalize_encoding(match.group(1).decode('ascii'))
+    # A page that could be read far enough to find the tag is not UTF-16/32, whatever it says
+    if encoding and encoding.startswith(('utf-16', 'utf-32')):
+        return 'utf-8'
+    return encoding
+
+
+def sniff_encoding(body: bytes) -> str:
+    """
+    Guess an undeclared encoding from the first SNIFF_BYTES of the body.
+
+    Valid UTF-8 is accepted straight away, which covers most modern pages
+    including Devanagari and Urdu ones; only other bytes go to the statistical
+    detector, and never more than SNIFF_BYTES of them.
+    """
+    sample = body[:SNIFF_BYTES]
+    try:
+        sample.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut in half at the end of the sample is still UTF-8
+        if e.start >= len(sample) - 3 and e.reason == 'unexpected end of data':
+            return 'utf-8'
+    return normalize_encoding(chardet.detect(sample)['encoding']) or 'utf-8'
+
+
+def detect_encoding(body: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Determine the encoding of a page body.
+
+    Checked in order: byte order mark, Content-Type charset, <meta> declaration
+    in the first META_SCAN_BYTES, and finally a bounded sniff of the body.
+
+    Args:
+        body: The raw response body
+        content_type: The Content-Type response header, if any
+
+    Returns:
+        (encoding, source) where source is 'bom', 'header', 'meta' or 'sniff'
+    """
+    encoding = charset_from_bom(body)
+    if encoding:
+        return encoding, 'bom'
+    encoding = charset_from_content_type(content_type)
+    if encoding:
+        return encoding, 'header'
+    encoding = charset_from_meta(body)
+    if encoding:
+        return encoding, 'meta'
+    return sniff_encoding(body), 'sniff'
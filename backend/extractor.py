@@ -0,0 +1,599 @@
+import bisect
+import html as html_entities
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, Tag
+
+from . import metrics
+from .html_parser import parse_html
+from .selector_registry import get_selector_registry
+from .strategy_memo import StrategyMemo
+
+logger = logging.getLogger(__name__)
+
+# Common class names of article content containers
+CONTENT_CLASSES = ['content', 'article-content', 'entry-content', 'post-content', 'story', 'article-body',
+                   'story-content', 'news-content', 'text', 'body', 'main-content', 'page-content']
+
+# Elements that typically contain non-article content
+UNWANTED_TAGS = ['script', 'style', 'header', 'footer', 'nav', 'aside', 'iframe', 'form', 'noscript']
+
+# Class names that suggest advertisements, menus, etc.
+AD_CLASSES = ['ad', 'ads', 'advertisement', 'banner', 'promo', 'sidebar', 'menu', 'navigation', 'comment',
+              'share', 'social', 'related', 'recommended', 'newsletter', 'subscribe']
+
+# Class names of LiveBlog containers and of the posts inside them
+LIVEBLOG_INDICATORS = ['liveblog', 'live-blog', 'live-updates', 'live-coverage', 'timeline']
+LIVEBLOG_POST_CLASSES = ['post', 'update', 'entry', 'item']
+
+# Class names and ids of article containers - expanded lists
+ARTICLE_CLASSES = ['article', 'post', 'entry', 'news-content', 'story', 'content-body', 'article-body',
+                   'story-body', 'main-content', 'page-content', 'entry-content', 'article-content',
+                   'story-content', 'news-article', 'post-content']
+ARTICLE_IDS = ['article', 'post', 'entry', 'content', 'main-content', 'article-content', 'story-content',
+               'page-content', 'primary-content', 'main', 'content-body', 'article-body']
+
+# Minimum length of an extraction worth returning
+MIN_ARTICLE_LENGTH = 150
+MIN_LIVEBLOG_LENGTH = 300
+
+# <script type="application/ld+json"> blocks in raw markup, for reading structured data without parsing the page
+JSON_LD_MARKER = 'application/ld+json'
+JSON_LD_SCRIPT_PATTERN = r'<script\b[^>]*?\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>'
+JSON_LD_PATTERNS = {
+    str: re.compile(JSON_LD_SCRIPT_PATTERN, re.IGNORECASE | re.DOTALL),
+    bytes: re.compile(JSON_LD_SCRIPT_PATTERN.encode('ascii'), re.IGNORECASE | re.DOTALL),
+}
+
+
+class DomIndex:
+    """
+    Lookup tables over a parsed document, built in a single walk of the tree.
+
+    Elements are numbered in document order. Because the descendants of an
+    element are numbered contiguously, "inside this element" becomes a range
+    check, and lookups by tag, class token or id never walk the tree again.
+    Class and id substring queries scan the distinct tokens, which are far
+    fewer than the elements, and are memoized.
+
+    Elements removed with remove_unwanted() are marked rather than re-indexed,
+    and every lookup skips them.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.elements: List[Tag] = soup.find_all(True)
+        self._position: Dict[int, int] = {id(element): i for i, element in enumerate(self.elements)}
+        self._end = list(range(len(self.elements)))  # Position of the last descendant
+        self._removed = bytearray(len(self.elements))
+
+        self._by_tag: Dict[str, List[int]] = {}
+        self._by_class: Dict[str, List[int]] = {}
+        self._by_id: Dict[str, List[int]] = {}
+        parents = []
+
+        for i, element in enumerate(self.elements):
+            self._by_tag.setdefault(element.name, []).append(i)
+
+            classes = element.get('class')
+            if classes:
+                if isinstance(classes, str):
+                    classes = classes.split()
+                for token in set(token.lower() for token in classes):
+                    self._by_class.setdefault(token, []).append(i)
+
+            element_id = element.get('id')
+            if element_id and isinstance(element_id, str):
+                self._by_id.setdefault(element_id.lower(), []).append(i)
+
+            parents.append(self._position.get(id(element.parent), -1))
+
+        # Children come after their parents, so one reverse sweep propagates subtree ends
+        for i in range(len(self.elements) - 1, -1, -1):
+            parent = parents[i]
+            if parent >= 0 and self._end[i] > self._end[parent]:
+                self._end[parent] = self._end[i]
+
+        self._class_queries: Dict[str, List[int]] = {}
+        self._id_queries: Dict[str, List[int]] = {}
+
+    def _select(self, positions: List[int], tags: Optional[Iterable[str]] = None,
+                within: Optional[Tag] = None) -> List[Tag]:
+        """Live elements at the given sorted positions, optionally filtered by tag name and ancestor"""
+        if within is not None:
+            # Descendants are numbered contiguously after their ancestor
+            start = self._position[id(within)] + 1
+            end = self._end[start - 1]
+            positions = positions[bisect.bisect_left(positions, start):bisect.bisect_right(positions, end)]
+        tag_set = set(tags) if tags is not None else None
+        return [
+            self.elements[i] for i in positions
+            if not self._removed[i] and (tag_set is None or self.elements[i].name in tag_set)
+        ]
+
+    def _substring_positions(self, table: Dict[str, List[int]], memo: Dict[str, List[int]],
+                             substring: str) -> List[int]:
+        positions = memo.get(substring)
+        if positions is None:
+            matched = set()
+            for token, token_positions in table.items():
+                if substring in token:
+                    matched.update(token_positions)
+            positions = memo[substring] = sorted(matched)
+        return positions
+
+    def by_tag(self, *names: str, within: Optional[Tag] = None) -> List[Tag]:
+        """Elements with any of the tag names, in document order"""
+        if len(names) == 1:
+            positions = self._by_tag.get(names[0], [])
+        else:
+            positions = sorted(i for name in names for i in self._by_tag.get(name, []))
+        return self._select(positions, within=within)
+
+    def class_contains(self, substring: str, tags: Optional[Iterable[str]] = None,
+                       within: Optional[Tag] = None) -> List[Tag]:
+        """Elements with a class token containing the (lowercase) substring, in document order"""
+        positions = self._substring_positions(self._by_class, self._class_queries, substring)
+        return self._select(positions, tags, within)
+
+    def class_contains_any(self, substrings: Iterable[str], tags: Optional[Iterable[str]] = None,
+                           within: Optional[Tag] = None) -> List[Tag]:
+        """Elements with a class token containing any of the substrings, each once, in document order"""
+        positions = set()
+        for substring in substrings:
+            positions.update(self._substring_positions(self._by_class, self._class_queries, substring))
+        return self._select(sorted(positions), tags, within)
+
+    def id_contains(self, substring: str, tags: Optional[Iterable[str]] = None) -> List[Tag]:
+        """Elements whose id contains the (lowercase) substring, in document order"""
+        positions = self._substring_positions(self._by_id, self._id_queries, substring)
+        return self._select(positions, tags)
+
+    def paragraphs(self, element: Tag) -> List[Tag]:
+        """The <p> elements inside an element"""
+        return self.by_tag('p', within=element)
+
+    def remove_unwanted(self, tags: Iterable[str], class_substrings: Iterable[str]) -> int:
+        """
+        Decompose every element with one of the tags or a class token containing one of the substrings.
+
+        Matching elements are marked first and only the outermost ones are
+        decomposed, in one pass over the document.
+
+        Returns:
+            Number of subtrees removed
+        """
+        marked = set()
+        for name in tags:
+            marked.update(self._by_tag.get(name, []))
+        for substring in class_substrings:
+            marked.update(self._substring_positions(self._by_class, self._class_queries, substring))
+
+        removed = 0
+        covered_until = -1
+        for i in sorted(marked):
+            if i <= covered_until or self._removed[i]:
+                continue
+            end = self._end[i]
+            self._removed[i:end + 1] = b'\x01' * (end + 1 - i)
+            covered_until = end
+            self.elements[i].decompose()
+            removed += 1
+        return removed
+
+
+@dataclass
+class Extraction:
+    """Text extracted from a page and the strategy that produced it"""
+    text: str
+    strategy: str
+    detail: Optional[str] = None  # Selector, class name or id that matched, if any
+
+
+@dataclass
+class ExtractionContext:
+    """Everything the extraction strategies share for one page"""
+    soup: BeautifulSoup
+    index: DomIndex
+    domain: str
+    json_ld: List[str] = field(default_factory=list)  # Raw application/ld+json blocks
+    hint: Optional[str] = None  # Selector, class name or indicator that worked before on this domain
+
+
+def _hinted_first(values: Iterable[str], hint: Optional[str]) -> List[str]:
+    """The values with the learned one moved to the front"""
+    values = list(values)
+    if hint in values:
+        values.remove(hint)
+        values.insert(0, hint)
+    return values
+
+
+def _paragraph_text(paragraphs: List[Tag]) -> str:
+    return ' '.join([p.get_text().strip() for p in paragraphs])
+
+
+def strategy_site_selectors(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Try to extract content using the precompiled selectors registered for the domain"""
+    selectors = dict(get_selector_registry().selectors_for(ctx.domain))
+    for selector in _hinted_first(selectors, ctx.hint):
+        try:
+            article_content = selectors[selector].select_one(ctx.soup)
+            if article_content:
+                # Try to get paragraphs first
+                paragraphs = ctx.index.paragraphs(article_content)
+                if paragraphs:
+                    extracted_text = _paragraph_text(paragraphs)
+                else:
+                    # If no paragraphs, get all text
+                    extracted_text = article_content.get_text().strip()
+
+                if len(extracted_text) > MIN_ARTICLE_LENGTH:
+                    logger.info("Used site-specific extraction for %s with selector %s", ctx.domain, selector)
+                    return Extraction(extracted_text, 'site_selectors', selector)
+        except Exception as e:
+            logger.warning("Error with selector %s for %s: %s", selector, ctx.domain, e)
+            continue
+    return None
+
+
+def strategy_article_tags(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Paragraphs of the first <article> with enough text"""
+    for article_tag in ctx.index.by_tag('article'):
+        paragraphs = ctx.index.paragraphs(article_tag)
+        if paragraphs:
+            extracted_text = _paragraph_text(paragraphs)
+            if len(extracted_text) > MIN_ARTICLE_LENGTH:
+                logger.info("Used article tag extraction")
+                return Extraction(extracted_text, 'article_tags')
+    return None
+
+
+def strategy_main_tag(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Paragraphs of the <main> element"""
+    main_tags = ctx.index.by_tag('main')
+    if main_tags:
+        paragraphs = ctx.index.paragraphs(main_tags[0])
+        if paragraphs:
+            extracted_text = _paragraph_text(paragraphs)
+            if len(extracted_text) > MIN_ARTICLE_LENGTH:
+                logger.info("Used main tag extraction")
+                return Extraction(extracted_text, 'main_tag')
+    return None
+
+
+def strategy_content_divs(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Paragraphs of a div or section with a common content class name"""
+    for class_name in _hinted_first(CONTENT_CLASSES, ctx.hint):
+        for content_div in ctx.index.class_contains(class_name, tags=('div', 'section')):
+            paragraphs = ctx.index.paragraphs(content_div)
+            if paragraphs:
+                extracted_text = _paragraph_text(paragraphs)
+                if len(extracted_text) > MIN_ARTICLE_LENGTH:
+                    logger.info("Used content div extraction with class: %s", class_name)
+                    return Extraction(extracted_text, 'content_divs', class_name)
+    return None
+
+
+def strategy_liveblog(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Look for LiveBlog content (special case for news sites)"""
+    for indicator in _hinted_first(LIVEBLOG_INDICATORS, ctx.hint):
+        liveblog_elements = ctx.index.class_contains(indicator)
+        if liveblog_elements:
+            logger.info("Detected liveblog format, applying special extraction")
+            liveblog_text = ""
+            for element in liveblog_elements:
+                posts = ctx.index.class_contains_any(LIVEBLOG_POST_CLASSES, tags=('div', 'article', 'section'),
+                                                     within=element)
+                for post in posts:
+                    post_text = _paragraph_text(ctx.index.paragraphs(post))
+                    if post_text:
+                        liveblog_text += post_text + " "
+
+            if len(liveblog_text) > MIN_LIVEBLOG_LENGTH:
+                logger.info("Successfully extracted liveblog content: %d chars", len(liveblog_text))
+                # Clean up the text
+                return Extraction(' '.join(liveblog_text.split()), 'liveblog', indicator)
+    return None
+
+
+def strategy_containers(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Longest paragraph text among specific article containers"""
+    article_containers = []
+
+    # Check for article tag
+    article_tags = ctx.index.by_tag('article')
+    if article_tags:
+        article_containers.append(article_tags[0])
+
+    # Check for common article container classes
+    for class_name in ARTICLE_CLASSES:
+        article_containers.extend(ctx.index.class_contains(class_name))
+
+    # Check for common article container IDs
+    for id_name in ARTICLE_IDS:
+        containers = ctx.index.id_contains(id_name)
+        if containers:
+            article_containers.append(containers[0])
+
+    # Try extracting text from article containers
+    extracted_text = ""
+    for container in article_containers:
+        paragraphs = ctx.index.paragraphs(container)
+        if paragraphs:
+            container_text = _paragraph_text(paragraphs)
+            if container_text and len(container_text) > len(extracted_text):
+                extracted_text = container_text
+    return Extraction(extracted_text, 'containers') if extracted_text else None
+
+
+def strategy_body_paragraphs(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Paragraphs that are likely to be part of the article, anywhere in the body"""
+    main_content = ctx.index.id_contains('content', tags=('main', 'div'))
+    if main_content:
+        paragraphs = ctx.index.paragraphs(main_content[0])
+    else:
+        paragraphs = ctx.index.by_tag('p')
+
+    # Filter out very short paragraphs which are likely navigation, headings etc.
+    valid_paragraphs = [p for p in paragraphs if len(p.get_text().strip()) > 20]
+    if valid_paragraphs:
+        return Extraction(_paragraph_text(valid_paragraphs), 'body_paragraphs')
+    return None
+
+
+def strategy_text_divs(ctx: ExtractionContext) -> Optional[Extraction]:
+    """The div with the most text among divs with substantial text and multiple sentences"""
+    extracted_text = ""
+    for div in ctx.index.by_tag('div'):
+        div_text = div.get_text().strip()
+        if len(div_text) > 300 and div_text.count('.') > 3:
+            div_text = div.get_text(' ', strip=True)
+            if len(div_text) > len(extracted_text):
+                extracted_text = div_text
+    return Extraction(extracted_text, 'text_divs') if extracted_text else None
+
+
+def _article_body(data, detail: Optional[str] = None, depth: int = 0) -> Optional[Tuple[str, Optional[str]]]:
+    """The first string articleBody in a JSON-LD value, searching lists and @graph arrays"""
+    if depth > 4:
+        return None
+    if isinstance(data, list):
+        for item in data:
+            found = _article_body(item, detail, depth + 1)
+            if found:
+                return found
+    elif isinstance(data, dict):
+        if isinstance(data.get('articleBody'), str) and data['articleBody'].strip():
+            return data['articleBody'], detail
+        if '@graph' in data:
+            return _article_body(data['@graph'], '@graph', depth + 1)
+    return None
+
+
+def article_body_from_json_ld(blocks: Iterable[str]) -> Optional[Extraction]:
+    """
+    schema.org articleBody from application/ld+json blocks.
+
+    Every block is checked, whether it holds a single object, a list of
+    objects or an @graph array.
+
+    Args:
+        blocks: Raw contents of the ld+json script tags
+
+    Returns:
+        The Extraction, with detail '@graph' when the body came from a graph, or None
+    """
+    for block in blocks:
+        try:
+            json_data = json.loads(block, strict=False)
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning("Failed to parse JSON-LD: %s", e)
+            continue
+        found = _article_body(json_data)
+        if found:
+            text, detail = found
+            # Some publishers entity-encode the body or keep the paragraph markup
+            if '&' in text:
+                text = html_entities.unescape(text)
+            return Extraction(' '.join(text.split()), 'json_ld', detail)
+    return None
+
+
+def json_ld_fast_path(markup: Union[str, bytes], encoding: Optional[str] = None) -> Optional[Extraction]:
+    """
+    Read articleBody from the raw page, before and instead of parsing it.
+
+    Args:
+        markup: The page HTML, as text or raw bytes
+        encoding: Encoding of the bytes, utf-8 if not given
+
+    Returns:
+        The Extraction if structured data holds enough article text, otherwise None
+    """
+    marker = JSON_LD_MARKER if isinstance(markup, str) else JSON_LD_MARKER.encode('ascii')
+    if marker not in markup:
+        return None
+    blocks = JSON_LD_PATTERNS[type(markup)].findall(markup)
+    if isinstance(markup, bytes):
+        blocks = [block.decode(encoding or 'utf-8', errors='replace') for block in blocks]
+    extraction = article_body_from_json_ld(blocks)
+    if extraction and len(extraction.text) > MIN_ARTICLE_LENGTH:
+        return extraction
+    return None
+
+
+def strategy_json_ld(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Try schema.org structured data (often used for news articles)"""
+    extraction = article_body_from_json_ld(ctx.json_ld)
+    if extraction:
+        logger.info("Used schema.org articleBody extraction")
+    return extraction
+
+
+def strategy_scored_paragraphs(ctx: ExtractionContext) -> Optional[Extraction]:
+    """Fallback: score text containers on length and position and keep the best ones"""
+    text_containers = ctx.index.by_tag('p', 'div', 'section', 'article', 'span')
+
+    # Score paragraphs based on length and position
+    scored_paragraphs = []
+    for i, container in enumerate(text_containers):
+        text = container.get_text().strip()
+        if len(text) > 30:  # Only consider paragraphs with substantial text
+            # Score based on length (longer is better) and position (middle of page is better)
+            length_score = min(1.0, len(text) / 200)  # Cap at 1.0
+            position_score = 1.0 - abs((i / len(text_containers)) - 0.5) * 2  # Higher in middle
+            score = length_score * 0.7 + position_score * 0.3
+            scored_paragraphs.append((text, score))
+
+    # Sort by score and take top paragraphs
+    scored_paragraphs.sort(key=lambda x: x[1], reverse=True)
+    top_paragraphs = [p[0] for p in scored_paragraphs[:min(20, len(scored_paragraphs))]]  # Take top 20 max
+
+    if top_paragraphs:
+        logger.info("Used advanced fallback paragraph extraction")
+        return Extraction(' '.join(top_paragraphs), 'scored_paragraphs')
+    return None
+
+
+Strategy = Callable[[ExtractionContext], Optional[Extraction]]
+
+# Run on the full document; the first one to find enough text wins
+PRIMARY_STRATEGIES: List[Tuple[str, Strategy]] = [
+    ('site_selectors', strategy_site_selectors),
+    ('article_tags', strategy_article_tags),
+    ('main_tag', strategy_main_tag),
+    ('content_divs', strategy_content_divs),
+]
+
+# Run after unwanted elements are removed; the longest text wins, stopping once one is long enough
+CLEANED_STRATEGIES: List[Tuple[str, Strategy]] = [
+    ('containers', strategy_containers),
+    ('body_paragraphs', strategy_body_paragraphs),
+    ('text_divs', strategy_text_divs),
+]
+
+# Run only while nothing at all has been extracted; the first one to find any text wins
+LAST_RESORT_STRATEGIES: List[Tuple[str, Strategy]] = [
+    ('json_ld', strategy_json_ld),
+    ('scored_paragraphs', strategy_scored_paragraphs),
+]
+
+PRIMARY_STRATEGY_NAMES = {name for name, _ in PRIMARY_STRATEGIES}
+
+# Strategies that target the article itself, by name, for replaying the one a StrategyMemo learned. The
+# generic fallbacks are left out: they rarely come up short, so a single fallthrough page would lock its
+# domain onto them even on pages a targeted strategy extracts properly
+STRATEGIES: Dict[str, Strategy] = dict(
+    PRIMARY_STRATEGIES + [('liveblog', strategy_liveblog), ('json_ld', strategy_json_ld)]
+)
+
+
+def extract_article(html: Union[str, bytes], domain: str, parser: Optional[str] = None,
+                    encoding: Optional[str] = None, memo: Optional[StrategyMemo] = None,
+                    structured_data: bool = True) -> Optional[Extraction]:
+    """
+    Extract the main article text from a page with multiple strategies.
+
+    A schema.org articleBody in the raw markup is returned without parsing the
+    page. Otherwise, with a memo, the targeted strategy that worked best on
+    earlier pages from the same domain is tried first, and the whole pipeline
+    only runs if it comes up short. Wins of the generic fallbacks are not learned.
+
+    Args:
+        html: The page HTML, as text or raw bytes
+        domain: Lowercased host name of the page, for site-specific selectors
+        parser: HTML parser backend, see html_parser.PARSER_BACKENDS
+        encoding: Encoding of the bytes, when html is bytes and it is known
+        memo: Learned per-domain strategies, updated with the outcome
+        structured_data: Try the schema.org articleBody fast path, False when the caller already has
+
+    Returns:
+        The Extraction, or None if no strategy found enough text
+    """
+    # Most news sites publish the whole body as structured data; when they do, skip parsing altogether
+    if structured_data:
+        with metrics.STRATEGY_SECONDS.time(strategy='json_ld_fast_path'):
+            extraction = json_ld_fast_path(html, encoding)
+        if extraction is not None:
+            logger.info("Used schema.org articleBody from the raw page")
+            return _won(extraction)
+
+    soup = parse_html(html, parser, from_encoding=encoding)
+    ctx = ExtractionContext(soup=soup, index=DomIndex(soup), domain=domain)
+
+    # Structured data lives in <script> tags, which are removed below
+    ctx.json_ld = [
+        script.string for script in ctx.index.by_tag('script')
+        if script.get('type') == 'application/ld+json' and script.string
+    ]
+
+    cleaned = False
+    learned = memo.best(domain) if memo is not None else None
+    if learned is not None:
+        name, ctx.hint = learned
+        strategy = STRATEGIES.get(name)
+        if strategy is not None:
+            if name not in PRIMARY_STRATEGY_NAMES:
+                ctx.index.remove_unwanted(UNWANTED_TAGS, AD_CLASSES)
+                cleaned = True
+            extraction = _run_strategy(name, strategy, ctx)
+            if extraction and len(extraction.text) > MIN_ARTICLE_LENGTH:
+                memo.record_success(domain, extraction.strategy, extraction.detail, replayed=True)
+                return _won(extraction)
+        memo.record_failure(domain, name, ctx.hint)
+        logger.info("Learned strategy %s failed for %s, running the full pipeline", name, domain)
+
+    extraction = _run_pipeline(ctx, cleaned)
+    if extraction is not None and memo is not None and extraction.strategy in STRATEGIES:
+        memo.record_success(domain, extraction.strategy, extraction.detail)
+    return _won(extraction) if extraction is not None else None
+
+
+def _run_strategy(name: str, strategy: Strategy, ctx: ExtractionContext) -> Optional[Extraction]:
+    """Run one strategy, timing it in the metrics"""
+    with metrics.STRATEGY_SECONDS.time(strategy=name):
+        return strategy(ctx)
+
+
+def _won(extraction: Extraction) -> Extraction:
+    metrics.EXTRACTIONS.inc(strategy=extraction.strategy)
+    return extraction
+
+
+def _run_pipeline(ctx: ExtractionContext, cleaned: bool) -> Optional[Extraction]:
+    """Every strategy in the fixed order; the primary ones see the cleaned page if a learned replay removed elements"""
+    for name, strategy in PRIMARY_STRATEGIES:
+        extraction = _run_strategy(name, strategy, ctx)
+        if extraction and len(extraction.text) > MIN_ARTICLE_LENGTH:
+            return extraction
+
+    # Remove unwanted elements and elements with class names that suggest
+    # advertisements, menus, etc. in a single marked-subtree pass
+    if not cleaned:
+        ctx.index.remove_unwanted(UNWANTED_TAGS, AD_CLASSES)
+
+    extraction = _run_strategy('liveblog', strategy_liveblog, ctx)
+    if extraction:
+        return extraction
+
+    best = None
+    for name, strategy in CLEANED_STRATEGIES:
+        if best and len(best.text) >= MIN_ARTICLE_LENGTH:
+            break
+        extraction = _run_strategy(name, strategy, ctx)
+        if extraction and (best is None or len(extraction.text) > len(best.text)):
+            best = extraction
+
+    for name, strategy in LAST_RESORT_STRATEGIES:
+        if best is not None and best.text:
+            break
+        best = _run_strategy(name, strategy, ctx)
+
+    # Final check - do we have enough content?
+    if not best or len(best.text) < MIN_ARTICLE_LENGTH:
+        return None
+    return best
@@ -0,0 +1,331 @@
+import http.cookiejar
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .encoding import detect_encoding
+from .page_cache import PageCache
+from .retry import BreakerRegistry, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Use a realistic browser user agent to avoid being blocked
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+# Timeout in seconds, or a (connect, read) tuple, used when fetch_page is not given one
+Timeout = Union[float, Tuple[float, float]]
+
+# Content types worth downloading; anything else (PDFs, images, video...) is rejected from the headers
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'application/xml', 'text/xml', 'text/plain')
+
+# Bytes read from the socket at a time while streaming a body
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Process-wide HTTP session with keep-alive connection pools, see configure_session()
+_session: Optional[requests.Session] = None
+_session_lock = threading.RLock()
+_session_settings = {'pool_connections': 32, 'pool_maxsize': 16, 'timeout': (5.0, 15.0)}
+
+# Download limits shared by fetch_page and fetch_page_async, see configure_download()
+_download_settings = {'max_bytes': 5 * 1024 * 1024}
+
+# Retries and per-host circuit breakers shared by every fetch in the process, see configure_retry()
+retry_policy = RetryPolicy()
+metrics.counter_function('truthscan_fetch_retries_total', 'Page download attempts retried after a transient failure',
+                         lambda: {(): retry_policy.stats()['counters']['retries']})
+
+# Process-wide page cache, created on first use unless configure_page_cache() was called
+_page_cache: Optional[PageCache] = None
+_page_cache_configured = False
+
+
+def configure_page_cache(directory: Optional[str], max_bytes: int = 256 * 1024 * 1024) -> Optional[PageCache]:
+    """
+    Set up the page cache used by fetch_page.
+
+    Args:
+        directory: Cache directory, or None to disable page caching
+        max_bytes: Upper bound on the total size of cached bodies
+
+    Returns:
+        The configured PageCache, or None when disabled
+    """
+    global _page_cache, _page_cache_configured
+    _page_cache = PageCache(directory, max_bytes) if directory else None
+    _page_cache_configured = True
+    return _page_cache
+
+
+def no_cookie_policy() -> http.cookiejar.DefaultCookiePolicy:
+    """
+    Cookie policy that accepts no cookies.
+
+    The HTTP clients are shared by every request of the process, so a stored
+    cookie would be sent on other users' fetches of the same site, carrying a
+    publisher session over and counting against paywall meters.
+    """
+    return http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+
+
+def configure_session(pool_connections: int = 32, pool_maxsize: int = 16,
+                      timeout: Timeout = (5.0, 15.0)) -> requests.Session:
+    """
+    Set up the shared session used by fetch_page.
+
+    Connections are kept alive and pooled per host, so repeated fetches from the
+    same news domains skip the TCP and TLS handshakes. Cookies are not kept.
+
+    Args:
+        pool_connections: Number of hosts whose connection pools are kept
+        pool_maxsize: Maximum idle connections kept per host
+        timeout: Default timeout in seconds, or a (connect, read) tuple
+
+    Returns:
+        The new session
+    """
+    global _session
+    session = requests.Session()
+    session.cookies.set_policy(no_cookie_policy())
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    with _session_lock:
+        previous, _session = _session, session
+        _session_settings.update(pool_connections=pool_connections, pool_maxsize=pool_maxsize, timeout=timeout)
+    if previous is not None:
+        previous.close()
+    return session
+
+
+def get_session() -> requests.Session:
+    """The shared session, created with the current settings on first use"""
+    with _session_lock:
+        if _session is None:
+            configure_session(**_session_settings)
+        return _session
+
+
+def configure_download(max_bytes: int = 5 * 1024 * 1024) -> None:
+    """
+    Set the download limits used by fetch_page and fetch_page_async.
+
+    Args:
+        max_bytes: Bytes of a body read at most; the rest of a longer page is never downloaded
+    """
+    _download_settings.update(max_bytes=max_bytes)
+
+
+def configure_retry(max_attempts: int = 3, base_delay: float = 0.25, max_delay: float = 2.0,
+                    deadline: float = 20.0, failure_threshold: int = 5, reset_timeout: float = 30.0) -> RetryPolicy:
+    """
+    Replace the retry policy used by fetch_page and fetch_page_async.
+
+    Args:
+        max_attempts: Attempts per fetch, including the first one
+        base_delay: Backoff before the first retry, doubled for each further one
+        max_delay: Upper bound on a single backoff
+        deadline: Seconds a fetch may take in total, across all attempts
+        failure_threshold: Consecutive failures that open a host's circuit breaker
+        reset_timeout: Seconds an open breaker waits before letting a trial request through
+
+    Returns:
+        The new RetryPolicy
+    """
+    global retry_policy
+    retry_policy = RetryPolicy(max_attempts, base_delay, max_delay, deadline,
+                               BreakerRegistry(failure_threshold, reset_timeout))
+    return retry_policy
+
+
+class UnsupportedContentError(Exception):
+    """Raised before the body is downloaded when the server says it is not an HTML page"""
+
+    def __init__(self, url: str, content_type: Optional[str]):
+        super().__init__(f"Unsupported content type {content_type} for {url}")
+        self.url = url
+        self.content_type = content_type
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """True if a Content-Type header may hold a page worth extracting; a missing header gets the benefit of the doubt"""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def host_key(url: str) -> str:
+    """Circuit breaker key for a URL: its lowercased host name"""
+    return (urlparse(url).hostname or url).lower()
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for download errors worth retrying: connection problems, timeouts, 5xx and 429 responses"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return status >= 500 or status == 429
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def _bounded_timeout(timeout: Timeout, remaining: float) -> Timeout:
+    """Shrink a timeout so a single attempt cannot outlive the retry deadline"""
+    remaining = max(0.1, remaining)
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """The page cache in use, falling back to TRUTHSCAN_PAGE_CACHE_DIR or a temp directory"""
+    if not _page_cache_configured:
+        directory = os.environ.get('TRUTHSCAN_PAGE_CACHE_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'truthscan_page_cache'))
+        configure_page_cache(directory)
+    return _page_cache
+
+
+@dataclass
+class FetchResult:
+    """A downloaded page, either fresh from the server or revalidated from the page cache"""
+    url: str
+    body: bytes
+    content_type: Optional[str]
+    encoding: Optional[str]
+    from_cache: bool = False
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the encoding determined when it was downloaded"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+def fetch_page(url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[Timeout] = None) -> FetchResult:
+    """
+    Download a page, revalidating the cached copy if there is one.
+
+    A cached copy is offered to the server with If-None-Match / If-Modified-Since;
+    on a 304 the stored body is returned without downloading it again. The body
+    is streamed and reading stops at the configure_download() byte cap; responses
+    whose Content-Type is not HTML are rejected before any of the body is read.
+    Transient failures are retried under retry_policy, and hosts whose circuit
+    breaker is open fail immediately.
+
+    Args:
+        url: The URL to fetch
+        headers: Request headers, DEFAULT_HEADERS if not given
+        timeout: Timeout in seconds or (connect, read), the configure_session() default if not given
+
+    Returns:
+        FetchResult for the page
+
+    Raises:
+        CircuitOpenError if the host is failing, UnsupportedContentError if the URL is not an HTML page,
+        otherwise requests.RequestException if the download fails or the server returns an error status
+    """
+    if timeout is None:
+        timeout = _session_settings['timeout']
+    started = time.perf_counter()
+    try:
+        result = retry_policy.call(
+            lambda remaining: _fetch_once(url, headers, _bounded_timeout(timeout, remaining)),
+            host_key(url),
+            is_transient_error
+        )
+    except Exception:
+        metrics.FETCH_SECONDS.observe(time.perf_counter() - started, outcome='error')
+        raise
+    observe_fetch(started, result)
+    return result
+
+
+def observe_fetch(started: float, result: FetchResult) -> None:
+    """Record a completed download, which began at perf_counter() time started, in the metrics"""
+    if result.from_cache:
+        metrics.PAGE_CACHE_REVALIDATIONS.inc()
+    else:
+        metrics.PAGE_BYTES.inc(len(result.body))
+    metrics.FETCH_SECONDS.observe(time.perf_counter() - started,
+                                  outcome='revalidated' if result.from_cache else 'downloaded')
+
+
+def _fetch_once(url: str, headers: Optional[Dict[str, str]], timeout: Timeout) -> FetchResult:
+    """A single download attempt for fetch_page"""
+    cache = get_page_cache()
+    cached = cache.get(url) if cache is not None else None
+
+    request_headers = dict(headers or DEFAULT_HEADERS)
+    if cached is not None:
+        request_headers.update(cache.conditional_headers(cached))
+
+    response = get_session().get(url, headers=request_headers, timeout=timeout, stream=True)
+    try:
+        if response.status_code == 304 and cached is not None:
+            logger.debug("Page cache revalidated for %s", url)
+            response.content  # Drain the empty body so the connection goes back to the pool
+            cache.touch(url)
+            return FetchResult(url=url, body=cached.body, content_type=cached.content_type,
+                               encoding=cached.encoding, from_cache=True)
+
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type')
+        if not is_html_content_type(content_type):
+            raise UnsupportedContentError(url, content_type)
+
+        max_bytes = _download_settings['max_bytes']
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                truncated = True
+                break
+    finally:
+        # An unread remainder makes close() drop the connection instead of pooling it
+        response.close()
+
+    body = b''.join(chunks)[:max_bytes]
+    if truncated:
+        logger.info("Stopped reading %s at %d bytes", url, max_bytes)
+    encoding, _ = detect_encoding(body, content_type)
+    if not truncated:
+        cache_response(cache, url, body, response.headers, encoding)
+
+    return FetchResult(url=url, body=body, content_type=content_type, encoding=encoding, truncated=truncated)
+
+
+def cache_response(cache: Optional[PageCache], url: str, body: bytes,
+                   headers: Mapping[str, str], encoding: Optional[str]) -> None:
+    """
+    Store a freshly downloaded page in the page cache if it can be revalidated later.
+
+    Args:
+        cache: The page cache, or None when caching is disabled
+        url: The URL that was fetched
+        body: The response body
+        headers: The response headers (case-insensitive mapping)
+        encoding: The encoding used to decode the body
+    """
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+
+    # Only pages that can be revalidated are worth keeping
+    cacheable = 'no-store' not in headers.get('Cache-Control', '').lower()
+    if cache is not None and cacheable and (etag or last_modified):
+        cache.put(url, body, etag, last_modified, headers.get('Content-Type'), encoding)
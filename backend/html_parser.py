@@ -0,0 +1,67 @@
+import logging
+import os
+from typing import List, Optional, Union
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# BeautifulSoup tree builders in order of preference, fastest first.
+# The extraction strategies are written against the BeautifulSoup API, so any
+# builder can be swapped in without touching them.
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+_available: Optional[List[str]] = None
+
+
+def available_backends() -> List[str]:
+    """Tree builders that are installed, in order of preference"""
+    global _available
+    if _available is None:
+        _available = []
+        for backend in PARSER_BACKENDS:
+            try:
+                BeautifulSoup('<p></p>', backend)
+            except FeatureNotFound:
+                continue
+            _available.append(backend)
+    return _available
+
+
+def default_backend() -> str:
+    """The backend named by TRUTHSCAN_HTML_PARSER if installed, otherwise the fastest available one"""
+    requested = os.environ.get('TRUTHSCAN_HTML_PARSER')
+    backends = available_backends()
+    if requested:
+        if requested in backends:
+            return requested
+        logger.warning("HTML parser %s is not available, using %s", requested, backends[0])
+    return backends[0]
+
+
+def parse_html(markup: Union[str, bytes], backend: Optional[str] = None,
+               from_encoding: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse a page with the chosen tree builder.
+
+    Bytes with a known encoding go straight to lxml, which decodes them in C.
+    html.parser only takes text, and BeautifulSoup would fall back to slow
+    whole-document detection if a strict decode failed, so for it the bytes
+    are decoded here with bad sequences replaced.
+
+    Args:
+        markup: The page HTML, as text or raw bytes
+        backend: Tree builder name, default_backend() if not given
+        from_encoding: Encoding of the bytes, when markup is bytes and it is known
+
+    Returns:
+        The parsed document
+    """
+    backend = backend or default_backend()
+    if isinstance(markup, bytes) and from_encoding and backend == 'html.parser':
+        markup = markup.decode(from_encoding, errors='replace')
+        from_encoding = None
+    with metrics.PARSE_SECONDS.time(parser=backend):
+        return BeautifulSoup(markup, backend, from_encoding=from_encoding)
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+
+class LexiconMatches:
+    """
+    Result of scanning a text with a LexiconMatcher.
+
+    Holds the start offsets of every phrase found in the text, and answers
+    per-lexicon questions (counts, presence) without touching the text again.
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]], positions: Dict[str, List[int]]):
+        self._lexicons = lexicons
+        self.positions = positions
+
+    def count(self, lexicon: str) -> int:
+        """
+        Number of lexicon entries that occur at least once in the text.
+        This matches the `sum(1 for phrase in lexicon if phrase in text)` idiom.
+        """
+        return sum(1 for phrase in self._lexicons[lexicon] if phrase in self.positions)
+
+    def present(self, lexicon: str) -> List[str]:
+        """Lexicon entries that occur in the text, in lexicon order"""
+        return [phrase for phrase in self._lexicons[lexicon] if phrase in self.positions]
+
+    def any(self, lexicon: str) -> bool:
+        """True if at least one entry of the lexicon occurs in the text"""
+        return any(phrase in self.positions for phrase in self._lexicons[lexicon])
+
+    def counts(self) -> Dict[str, int]:
+        """Counts for every lexicon"""
+        return {name: self.count(name) for name in self._lexicons}
+
+
+class LexiconMatcher:
+    """
+    Multi-pattern substring matcher compiled once for a set of named lexicons.
+
+    All phrases are merged into a single trie, which is emitted as one
+    regular expression and evaluated as a zero-width lookahead at every
+    offset. The regex engine therefore walks the text exactly once and the
+    cost grows with the text length, not with the number of phrases.
+
+    At each offset the lookahead reports the longest phrase starting there;
+    every shorter phrase starting at the same offset is a prefix of it, so
+    those are recovered from a precomputed prefix table. The result is the
+    same set of matches as running `phrase in text` for every phrase.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.lexicons = {name: list(phrases) for name, phrases in lexicons.items()}
+
+        phrases = sorted({phrase for entries in self.lexicons.values() for phrase in entries if phrase})
+        self._pattern = re.compile('(?=(' + self._trie_pattern(phrases) + '))') if phrases else None
+
+        # For every phrase, the phrases (itself included) that are its prefixes
+        phrase_set = set(phrases)
+        self._prefixes = {
+            phrase: [phrase[:i] for i in range(1, len(phrase) + 1) if phrase[:i] in phrase_set]
+            for phrase in phrases
+        }
+
+    @staticmethod
+    def _trie_pattern(phrases: List[str]) -> str:
+        """Build a regex whose alternations follow the shared-prefix trie of the phrases"""
+        trie: Dict[str, dict] = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def emit(node: Dict[str, dict]) -> str:
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # A phrase ends here, so the longer continuations are optional
+            return '(?:' + body + ')?' if '' in node else body
+
+        return emit(trie)
+
+    def scan(self, text_lower: str, limit: Optional[int] = None) -> LexiconMatches:
+        """
+        Scan an already lowercased text in a single pass.
+
+        Args:
+            text_lower: The lowercased text to scan
+            limit: Optional cap on the number of positions recorded per phrase
+
+        Returns:
+            LexiconMatches with the start offsets of every phrase found
+        """
+        positions: Dict[str, List[int]] = {}
+        if self._pattern is not None and text_lower:
+            prefixes = self._prefixes
+            for match in self._pattern.finditer(text_lower):
+                start = match.start()
+                for phrase in prefixes[match.group(1)]:
+                    offsets = positions.setdefault(phrase, [])
+                    if limit is None or len(offsets) < limit:
+                        offsets.append(start)
+        return LexiconMatches(self.lexicons, positions)
@@ -0,0 +1,221 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, from a cached lookup up to a slow download
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up, per combination of label values"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class CounterFunction(_Metric):
+    """A counter read at scrape time from a component that already keeps the count"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = ()):
+        """
+        Args:
+            read: Returns the current values keyed by tuples of label values
+        """
+        super().__init__(name, documentation, labelnames)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self.read().items())]
+
+
+class Histogram(_Metric):
+    """Observed values counted into cumulative buckets, with their sum, per combination of label values"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count per bucket (the last one is +Inf), then the sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[position] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the seconds the block takes, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0], [0.0]))
+            return sum(counts)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The metrics of this process, rendered together for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric, or return the one already registered under its name.
+
+        Raises:
+            ValueError if a different kind of metric has the name
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                if isinstance(metric, CounterFunction):
+                    # Re-registration replaces the source, e.g. when a component is reconfigured
+                    existing.read = metric.read
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = (),
+            registry: Optional[Registry] = None) -> Counter:
+    return (registry or REGISTRY).register(Counter(name, documentation, labelnames))
+
+
+def counter_function(name: str, documentation: str, read: Callable[[], Dict[Tuple[str, ...], float]],
+                     labelnames: Sequence[str] = (), registry: Optional[Registry] = None) -> CounterFunction:
+    return (registry or REGISTRY).register(CounterFunction(name, documentation, read, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = None) -> Histogram:
+    return (registry or REGISTRY).register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render() -> str:
+    """The metrics of this process for a /metrics response"""
+    return REGISTRY.render()
+
+
+# Stages of the verify pipeline shared by both apps
+FETCH_SECONDS = histogram('truthscan_fetch_seconds', 'Page download time, including retries and revalidation',
+                          ['outcome'])
+PAGE_BYTES = counter('truthscan_page_bytes_total', 'Bytes of page bodies downloaded')
+PAGE_CACHE_REVALIDATIONS = counter('truthscan_page_cache_revalidations_total',
+                                   'Downloads answered from the page cache after a 304')
+PARSE_SECONDS = histogram('truthscan_parse_seconds', 'HTML parse time', ['parser'])
+STRATEGY_SECONDS = histogram('truthscan_extraction_strategy_seconds', 'Time per extraction strategy run',
+                             ['strategy'])
+EXTRACTIONS = counter('truthscan_extractions_total', 'Article extractions by the strategy that won',
+                      ['strategy'])
+EXTRACTOR_SECONDS = histogram('truthscan_extractor_seconds', 'Time per scraper pipeline extractor run',
+                              ['extractor'])
+EXTRACTOR_WINS = counter('truthscan_extractor_wins_total', 'Scraper pipeline results by the extractor that won',
+                         ['extractor'])
+FALLBACK_REFETCHES = counter('truthscan_fallback_refetches_total',
+                             'Pages downloaded again by the paragraph fallback after extraction failed')
+SCORING_SECONDS = histogram('truthscan_scoring_seconds', 'Time to score articles, per call', ['detector'])
+VERDICTS = counter('truthscan_verdicts_total', 'Verdicts returned, by class', ['result'])
+REQUEST_SECONDS = histogram('truthscan_request_seconds', 'Total request time', ['endpoint', 'method', 'status'])
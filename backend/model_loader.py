@@ -0,0 +1,146 @@
+import json
+import logging
+import mmap
+import struct
+import sys
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# safetensors dtype names and the torch dtype attribute each maps to
+SAFETENSORS_DTYPES = {
+    'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+    'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool',
+}
+
+# Memory maps backing loaded weights; they must stay open as long as the tensors are in use
+_mappings: List[mmap.mmap] = []
+
+
+def memory_usage() -> Dict[str, Optional[int]]:
+    """
+    Resident memory of this process in bytes.
+
+    rss_file counts pages backed by files, such as memory-mapped weights, which
+    every process mapping the same file shares; rss_anon is private memory.
+    Outside Linux only the peak RSS is known, and on Windows it is None too.
+    """
+    usage = {"rss": None, "rss_anon": None, "rss_file": None, "peak_rss": None}
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        usage["peak_rss"] = peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                field, _, value = line.partition(':')
+                key = {'VmRSS': 'rss', 'RssAnon': 'rss_anon', 'RssFile': 'rss_file'}.get(field)
+                if key:
+                    usage[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return usage
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, 'torch.Tensor']:
+    """
+    Tensors of a .safetensors file, backed directly by a memory map of the file.
+
+    Nothing is copied: the tensors read the mapped pages, which the OS loads on
+    first touch and shares between every process mapping the file. The map is
+    private copy-on-write, so a write would only copy the page it touches.
+
+    Args:
+        path: The .safetensors file
+
+    Returns:
+        Tensors keyed by name
+    """
+    import torch
+
+    with open(path, 'rb') as weights:
+        mapped = mmap.mmap(weights.fileno(), 0, access=mmap.ACCESS_COPY)
+    _mappings.append(mapped)
+
+    header_size = struct.unpack('<Q', mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info['dtype']])
+        begin, end = info['data_offsets']
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + begin) if count else \
+            torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.view(info['shape'])
+    return tensors
+
+
+def safetensors_files(model_name: str) -> List[str]:
+    """
+    Local paths of a model's safetensors weights, downloading them if needed.
+
+    Raises:
+        FileNotFoundError if the model is not published as safetensors
+    """
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+
+    try:
+        return [hf_hub_download(model_name, 'model.safetensors')]
+    except EntryNotFoundError:
+        pass
+    try:
+        index_path = hf_hub_download(model_name, 'model.safetensors.index.json')
+    except EntryNotFoundError:
+        raise FileNotFoundError(f"{model_name} has no safetensors weights")
+    with open(index_path) as index_file:
+        shards = sorted(set(json.load(index_file)['weight_map'].values()))
+    return [hf_hub_download(model_name, shard) for shard in shards]
+
+
+def load_mmap_model(model_name: str):
+    """
+    Load a sequence classifier whose weights stay in a memory map of the safetensors file.
+
+    The model is built from its config and its parameters are then replaced
+    by the mapped tensors, so the weights do not count against the private
+    memory of the process. Worker processes loading the same model share one
+    copy through the page cache, and workers forked after preloading share it
+    copy-on-write.
+
+    Args:
+        model_name: Hugging Face model id
+
+    Returns:
+        The model, in eval mode
+
+    Raises:
+        FileNotFoundError if the model has no safetensors weights,
+        ValueError if their names do not match the model
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+
+    state_dict = {}
+    for path in safetensors_files(model_name):
+        state_dict.update(load_safetensors_mmap(path))
+
+    model = AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_name))
+    missing, unexpected = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    parameters = {name for name, _ in model.named_parameters()}
+    missing_parameters = [name for name in missing if name in parameters]
+    if missing_parameters:
+        # Checkpoints with legacy parameter names need from_pretrained's renaming
+        raise ValueError(f"{model_name} checkpoint does not match the model, missing {missing_parameters[:5]}")
+    if unexpected:
+        logger.debug("Unused weights in %s: %s", model_name, unexpected)
+    return model.eval()
@@ -0,0 +1,120 @@
+import inspect
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Where exported models are kept, one subdirectory per model name
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'truthscan', 'onnx')
+
+# Bump when the export changes so models exported by an earlier version are not loaded
+EXPORT_VERSION = 2
+
+
+def model_directory(model_name: str, base_dir: Optional[str] = None) -> str:
+    """Directory holding the exported files of a model"""
+    return os.path.join(base_dir or os.environ.get('TRUTHSCAN_ONNX_DIR', DEFAULT_ONNX_DIR),
+                        model_name.replace('/', '--'))
+
+
+def export_model(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export a Hugging Face sequence classifier to ONNX, optionally with dynamic int8 quantization.
+
+    Dynamic quantization stores the weights of the linear layers as int8 and
+    quantizes activations on the fly, which shrinks the model about four times
+    and speeds up CPU inference without calibration data.
+
+    Args:
+        model_name: Hugging Face model id
+        output_dir: Directory to write the model (and its int8-quantized copy) to
+        quantize: Also write the int8-quantized model
+
+    Returns:
+        Path of the model to load, the quantized one if requested
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, f'model.v{EXPORT_VERSION}.onnx')
+    int8_path = os.path.join(output_dir, f'model.v{EXPORT_VERSION}.int8.onnx')
+
+    if not os.path.exists(fp32_path):
+        logger.info("Exporting %s to ONNX in %s", model_name, output_dir)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        sample = tokenizer(["An example sentence for tracing."], return_tensors='pt')
+        # Graph inputs follow the order of forward()'s parameters, not the tokenizer's keys
+        parameters = list(inspect.signature(model.forward).parameters)
+        input_names = sorted(sample.keys(), key=parameters.index)
+        torch.onnx.export(
+            model,
+            ({name: sample[name] for name in input_names},),
+            fp32_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes={**{name: {0: 'batch', 1: 'sequence'} for name in input_names}, 'logits': {0: 'batch'}},
+            opset_version=14,
+        )
+        tokenizer.save_pretrained(output_dir)
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        logger.info("Quantizing %s to int8", fp32_path)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxEngine:
+    """
+    Sequence classifier running on ONNX Runtime instead of PyTorch.
+
+    Takes the numpy output of the model's tokenizer and returns logits, so the
+    detector can use it in place of the PyTorch model.
+    """
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0):
+        """
+        Args:
+            model_path: Exported .onnx file
+            intra_op_threads: Threads used inside one operator, 0 to let ONNX Runtime decide
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        self.model_path = model_path
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names: List[str] = [node.name for node in self.session.get_inputs()]
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        """Logits for a tokenized batch, shape (batch, labels)"""
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        return self.session.run(['logits'], feed)[0]
+
+
+def load_onnx_engine(model_name: str, quantize: bool = True, intra_op_threads: int = 0,
+                     base_dir: Optional[str] = None) -> OnnxEngine:
+    """
+    Load a model on ONNX Runtime, exporting (and quantizing) it on first use.
+
+    Args:
+        model_name: Hugging Face model id
+        quantize: Use the dynamically int8-quantized model
+        intra_op_threads: Threads used inside one operator, 0 to let ONNX Runtime decide
+        base_dir: Export directory, TRUTHSCAN_ONNX_DIR or ~/.cache/truthscan/onnx if not given
+
+    Returns:
+        The OnnxEngine
+    """
+    path = export_model(model_name, model_directory(model_name, base_dir), quantize)
+    logger.info("Loading ONNX model %s with %s intra-op threads", path, intra_op_threads or 'default')
+    return OnnxEngine(path, intra_op_threads)
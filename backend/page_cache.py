@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    """A page body stored in the PageCache, with the validators needed to revalidate it"""
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    encoding: Optional[str]
+    stored_at: float
+
+
+class PageCache:
+    """
+    Size-bounded on-disk cache of downloaded pages.
+
+    Bodies are content-addressed: each one is written once under the SHA-256 of
+    its bytes, so URLs serving identical pages share a file. An SQLite index maps
+    URLs to bodies and keeps the ETag / Last-Modified validators used to send
+    conditional requests. When the bodies exceed max_bytes, the least recently
+    used URLs are dropped along with any body no longer referenced.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            directory: Directory holding the index and the bodies
+            max_bytes: Upper bound on the total size of stored bodies
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._blob_dir = os.path.join(directory, 'blobs')
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """SQLite connection for the current thread, created on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=1.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'url TEXT PRIMARY KEY, body_hash TEXT NOT NULL, size INTEGER NOT NULL, '
+                'etag TEXT, last_modified TEXT, content_type TEXT, encoding TEXT, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def _blob_path(self, body_hash: str) -> str:
+        return os.path.join(self._blob_dir, body_hash[:2], body_hash)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Look up the stored copy of a URL.
+
+        Returns:
+            The CachedPage or None if the URL is not cached
+        """
+        try:
+            row = self._connection().execute(
+                'SELECT body_hash, etag, last_modified, content_type, encoding, stored_at '
+                'FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            with open(self._blob_path(row[0]), 'rb') as blob:
+                body = blob.read()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Page cache lookup failed for %s: %s", url, e)
+            return None
+        return CachedPage(url=url, body=body, etag=row[1], last_modified=row[2],
+                          content_type=row[3], encoding=row[4], stored_at=row[5])
+
+    @staticmethod
+    def conditional_headers(page: CachedPage) -> Dict[str, str]:
+        """Request headers that ask the server to answer 304 if the stored copy is current"""
+        headers = {}
+        if page.etag:
+            headers['If-None-Match'] = page.etag
+        if page.last_modified:
+            headers['If-Modified-Since'] = page.last_modified
+        return headers
+
+    def put(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str],
+            content_type: Optional[str] = None, encoding: Optional[str] = None) -> None:
+        """Store a freshly downloaded body and its validators, then enforce the size bound"""
+        if len(body) > self.max_bytes:
+            return
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(body_hash)
+        now = time.time()
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as blob:
+                    blob.write(body)
+                os.replace(temp_path, path)
+
+            connection = self._connection()
+            previous = connection.execute('SELECT body_hash FROM pages WHERE url = ?', (url,)).fetchone()
+            connection.execute(
+                'INSERT OR REPLACE INTO pages (url, body_hash, size, etag, last_modified, content_type, '
+                'encoding, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, body_hash, len(body), etag, last_modified, content_type, encoding, now, now)
+            )
+            connection.commit()
+            if previous is not None and previous[0] != body_hash:
+                self._drop_blob_if_unused(previous[0])
+            self._evict()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Page cache write failed for %s: %s", url, e)
+
+    def touch(self, url: str) -> None:
+        """Mark a URL as recently used, e.g. after a 304 confirmed the stored copy"""
+        try:
+            connection = self._connection()
+            connection.execute('UPDATE pages SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.warning("Page cache update failed for %s: %s", url, e)
+
+    def total_bytes(self) -> int:
+        """Size of all distinct stored bodies"""
+        row = self._connection().execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_hash, size FROM pages)'
+        ).fetchone()
+        return row[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used URLs until the bodies fit in max_bytes"""
+        connection = self._connection()
+        total = self.total_bytes()
+        while total > self.max_bytes:
+            row = connection.execute(
+                'SELECT url, body_hash, size FROM pages ORDER BY accessed_at LIMIT 1'
+            ).fetchone()
+            if row is None:
+                break
+            connection.execute('DELETE FROM pages WHERE url = ?', (row[0],))
+            connection.commit()
+            if self._drop_blob_if_unused(row[1]):
+                total -= row[2]
+
+    def _drop_blob_if_unused(self, body_hash: str) -> bool:
+        """Delete a body file once no URL refers to it"""
+        in_use = self._connection().execute(
+            'SELECT 1 FROM pages WHERE body_hash = ? LIMIT 1', (body_hash,)
+        ).fetchone()
+        if in_use:
+            return False
+        try:
+            os.remove(self._blob_path(body_hash))
+        except OSError:
+            pass
+        return True
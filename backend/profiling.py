@@ -0,0 +1,219 @@
+import cProfile
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 'cprofile' writes a pstats dump (pstats, snakeviz), 'collapsed' a folded-stack
+# file for flame graphs (flamegraph.pl, speedscope)
+PROFILE_MODES = ('cprofile', 'collapsed')
+
+PROFILE_EXTENSIONS = {'cprofile': 'prof', 'collapsed': 'collapsed'}
+
+# cProfile hooks the interpreter process-wide, so only one request can hold it at a time
+_cprofile_lock = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame) -> str:
+    """A frame and its callers as one folded-stack line, outermost first"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval from a background thread.
+
+    Unlike cProfile it does not slow down the profiled code, and it records
+    whole stacks, so the result can be drawn as a flame graph.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Args:
+            thread_id: threading.get_ident() of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        """Stop sampling and return the number of samples per folded stack"""
+        self._stop.set()
+        self._thread.join()
+        return dict(self.stacks)
+
+
+class RequestProfile:
+    """A profile of the work done on the current thread between start() and stop()"""
+
+    def __init__(self, mode: str, interval: float = 0.005):
+        self.mode = mode
+        self.interval = interval
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started = 0.0
+        self.seconds = 0.0
+
+    def start(self) -> bool:
+        """
+        Start profiling the calling thread.
+
+        Returns:
+            False if a cProfile profile is already running in another thread, in which case nothing is recorded
+        """
+        if self.mode == 'cprofile':
+            if not _cprofile_lock.acquire(blocking=False):
+                return False
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        self._started = time.perf_counter()
+        return True
+
+    def stop(self) -> None:
+        self.seconds = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    def save(self, path: str) -> None:
+        """Write the profile, as a pstats dump or as folded stacks"""
+        if self._profiler is not None:
+            self._profiler.dump_stats(path)
+            return
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in sorted(self._sampler.stacks.items()):
+                output.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and keeps their profiles in a rotating directory.
+
+    A request is profiled when it asks for it (if on-demand profiling is
+    enabled) or when it is one of every sample_every requests. Only the keep
+    most recent profiles are kept.
+    """
+
+    def __init__(self, directory: str, on_demand: bool = False, sample_every: int = 0, keep: int = 100,
+                 default_mode: str = 'collapsed', interval: float = 0.005):
+        """
+        Args:
+            directory: Where profiles are written
+            on_demand: Honour requests that ask to be profiled
+            sample_every: Profile one in this many requests, 0 for none
+            keep: Most profiles kept in the directory, the oldest are deleted first
+            default_mode: Mode for sampled requests and for requests that ask without naming one
+            interval: Seconds between stack samples in 'collapsed' mode
+        """
+        if default_mode not in PROFILE_MODES:
+            raise ValueError(f"default_mode must be one of {PROFILE_MODES}, not {default_mode!r}")
+        self.directory = directory
+        self.on_demand = on_demand
+        self.sample_every = sample_every
+        self.keep = keep
+        self.default_mode = default_mode
+        self.interval = interval
+        self._requests = itertools.count(1)
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def begin(self, requested: Optional[str] = None) -> Optional[RequestProfile]:
+        """
+        Start profiling the current request if it asked for it or is sampled.
+
+        Args:
+            requested: The profile flag sent with the request, a mode name or any
+                       true value for the default mode; None if not sent
+
+        Returns:
+            The running RequestProfile, or None if this request is not profiled
+        """
+        mode = None
+        if requested and self.on_demand:
+            mode = requested if requested in PROFILE_MODES else self.default_mode
+        elif self.sample_every and next(self._requests) % self.sample_every == 0:
+            mode = self.default_mode
+        if mode is None:
+            return None
+
+        profile = RequestProfile(mode, self.interval)
+        if not profile.start():
+            logger.debug("Skipping profile, another cProfile profile is running")
+            return None
+        return profile
+
+    def finish(self, profile: RequestProfile, label: str = 'request') -> Optional[str]:
+        """
+        Stop a profile and write it to the directory.
+
+        Returns:
+            File name of the profile, or None if it could not be written
+        """
+        profile.stop()
+        name = (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sequence)}-{label}"
+                f".{PROFILE_EXTENSIONS[profile.mode]}")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.save(os.path.join(self.directory, name))
+            self._rotate()
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", name, e)
+            return None
+        logger.info("Profiled %s in %.1f ms to %s", label, profile.seconds * 1000, name)
+        return name
+
+    def _rotate(self) -> None:
+        """Delete the oldest profiles beyond keep"""
+        with self._lock:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.rsplit('.', 1)[-1] in PROFILE_EXTENSIONS.values()]
+            if len(paths) <= self.keep:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.keep]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def list_profiles(self) -> List[str]:
+        """File names of the kept profiles, newest first"""
+        try:
+            names = [name for name in os.listdir(self.directory)
+                     if name.rsplit('.', 1)[-1] in PROFILE_EXTENSIONS.values()]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
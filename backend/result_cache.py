@@ -0,0 +1,154 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Two-tier cache for verification results.
+
+    The first tier is an in-process LRU with a TTL. The second tier is an
+    SQLite database shared by every worker process on the host, so a result
+    computed by one worker is a hit for all of them. Values must be
+    JSON-serializable. Cache failures are logged and treated as misses, they
+    never fail the caller.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, db_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Maximum number of entries kept in process memory
+            ttl: Seconds an entry stays valid in either tier
+            db_path: Path of the shared SQLite database, or None for memory only
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """SQLite connection for the current thread, created on first use"""
+        if not self.db_path:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=1.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a key, first in memory and then in the shared store.
+
+        Returns:
+            The cached value or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+
+        try:
+            connection = self._connection()
+            if connection is not None:
+                row = connection.execute(
+                    'SELECT value, expires_at FROM results WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    with self._lock:
+                        self.shared_hits += 1
+                    return value
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Shared result cache lookup failed: %s", e)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+
+        try:
+            connection = self._connection()
+            if connection is not None:
+                connection.execute(
+                    'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), expires_at)
+                )
+                with self._lock:
+                    self._writes += 1
+                    purge = self._writes % 1000 == 0
+                if purge:
+                    # Expired rows are skipped on read; drop them now and then
+                    connection.execute('DELETE FROM results WHERE expires_at <= ?', (time.time(),))
+                connection.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Shared result cache write failed: %s", e)
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert into the in-process LRU, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_hits = self.shared_hits = self.misses = 0
+        try:
+            connection = self._connection()
+            if connection is not None:
+                connection.execute('DELETE FROM results')
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.warning("Shared result cache clear failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters for this process"""
+        with self._lock:
+            hits = self.memory_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "shared_store": self.db_path,
+            }
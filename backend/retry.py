@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the host while its circuit breaker is open"""
+
+    def __init__(self, key: str, retry_in: float):
+        super().__init__(f"Circuit open for {key}, retry in {retry_in:.1f}s")
+        self.key = key
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single host.
+
+    After failure_threshold consecutive transient failures the circuit opens and
+    calls fail immediately. Once reset_timeout has passed it half-opens and lets
+    a single trial call through: success closes it again, failure reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """True if a call may go ahead, counting a rejection otherwise"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.total_rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit half-opens"""
+        with self._lock:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a call that was abandoned (e.g. cancelled) without an outcome, so the next one may be the trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit opened after %d consecutive failures", self.consecutive_failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "total_rejected": self.total_rejected,
+            }
+
+
+class BreakerRegistry:
+    """Circuit breakers created on demand, one per key (host)"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """State and counters of every breaker, keyed by host"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.snapshot() for key, breaker in breakers.items()}
+
+
+class RetryPolicy:
+    """
+    Retries with jittered exponential backoff under a total deadline, guarded by per-host circuit breakers.
+
+    The operation receives the seconds left before the deadline and should use
+    them to bound its own timeout. Errors for which is_transient returns False
+    (e.g. a 404) are raised at once and count as a healthy host. Transient errors
+    are retried after a random delay in [0, min(max_delay, base_delay * 2**n)]
+    as long as attempts and time remain, and count against the host's breaker.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.25, max_delay: float = 2.0,
+                 deadline: float = 20.0, breakers: Optional[BreakerRegistry] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breakers = breakers if breakers is not None else BreakerRegistry()
+        self._counters = {"calls": 0, "attempts": 0, "retries": 0, "successes": 0, "failures": 0,
+                          "rejected": 0, "deadline_exceeded": 0}
+        self._lock = threading.Lock()
+
+    def backoff(self, retry: int) -> float:
+        """Delay before the given retry (0-based), with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _before_attempt(self, key: str, started: float, attempt: int) -> float:
+        """Check the breaker and deadline before an attempt, returning the time left"""
+        breaker = self.breakers.get(key)
+        if not breaker.allow_request():
+            self._count('rejected')
+            raise CircuitOpenError(key, breaker.retry_in())
+        self._count('attempts')
+        if attempt:
+            self._count('retries')
+        return self.deadline - (time.monotonic() - started)
+
+    def _after_failure(self, key: str, error: Exception, is_transient: Callable[[Exception], bool],
+                       started: float, attempt: int) -> Optional[float]:
+        """Record a failed attempt, returning the delay before the next one or None to give up"""
+        breaker = self.breakers.get(key)
+        if not is_transient(error):
+            breaker.record_success()
+            self._count('failures')
+            return None
+        breaker.record_failure()
+
+        delay = self.backoff(attempt)
+        remaining = self.deadline - (time.monotonic() - started)
+        if attempt + 1 >= self.max_attempts:
+            self._count('failures')
+            return None
+        if remaining <= delay:
+            self._count('failures')
+            self._count('deadline_exceeded')
+            return None
+        logger.warning("Retry %d/%d for %s in %.2fs: %s", attempt + 1, self.max_attempts - 1, key, delay, error)
+        return delay
+
+    def call(self, operation: Callable[[float], T], key: str,
+             is_transient: Callable[[Exception], bool]) -> T:
+        """
+        Run operation(seconds_left) with retries.
+
+        Args:
+            operation: The call to make, given the seconds left before the deadline
+            key: Breaker key, normally the host name
+            is_transient: Tells whether an error is worth retrying
+
+        Returns:
+            The operation's result
+
+        Raises:
+            CircuitOpenError if the host's breaker is open, otherwise the last error
+        """
+        self._count('calls')
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self._before_attempt(key, started, attempt)
+            try:
+                result = operation(remaining)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # Interrupted rather than failed; a half-open breaker must not wait for this trial forever
+                    self.breakers.get(key).release_trial()
+                    raise
+                delay = self._after_failure(key, e, is_transient, started, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breakers.get(key).record_success()
+            self._count('successes')
+            return result
+
+    async def call_async(self, operation: Callable[[float], Awaitable[T]], key: str,
+                         is_transient: Callable[[Exception], bool]) -> T:
+        """Async counterpart of call(); waits between attempts without blocking the event loop"""
+        self._count('calls')
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self._before_attempt(key, started, attempt)
+            try:
+                result = await operation(remaining)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # Cancelled, e.g. the client disconnected; a half-open breaker must not wait for this trial forever
+                    self.breakers.get(key).release_trial()
+                    raise
+                delay = self._after_failure(key, e, is_transient, started, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breakers.get(key).record_success()
+            self._count('successes')
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry counters and the state of every circuit breaker"""
+        with self._lock:
+            counters = dict(self._counters)
+        return {"counters": counters, "breakers": self.breakers.snapshot()}
@@ -1,67 +1,238 @@
 import logging
-import requests
-from bs4 import BeautifulSoup
+import re
+import threading
+import time
 import trafilatura
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import urlparse
+from . import metrics
+from .extractor import extract_article, json_ld_fast_path
+from .fetcher import fetch_page
+from .html_parser import parse_html
 
 logger = logging.getLogger(__name__)
 
+# Sentence ends in English, Hindi (danda) and Urdu (full stop)
+SENTENCE_END_PATTERN = re.compile(r'[.!?।۔](?:\s|$)')
+
+
+@dataclass
+class Extractor:
+    """One way of getting article text out of a downloaded page"""
+    name: str
+    extract: Callable[[Union[str, bytes], str, Optional[str]], Optional[str]]  # (markup, url, encoding) -> text
+    weight: float  # How much a result of this extractor is trusted, multiplied into its quality
+    budget: float  # Seconds the extractor is expected to need at most
+
+
+@dataclass
+class Candidate:
+    """Text produced by one extractor, with its score"""
+    extractor: str
+    text: str
+    quality: float
+    score: float
+    elapsed: float
+
+
+def _decoded(markup: Union[str, bytes], encoding: Optional[str]) -> str:
+    if isinstance(markup, bytes):
+        return markup.decode(encoding or 'utf-8', errors='replace')
+    return markup
+
+
+def extract_with_json_ld(markup: Union[str, bytes], url: str, encoding: Optional[str]) -> Optional[str]:
+    extraction = json_ld_fast_path(markup, encoding)
+    return extraction.text if extraction else None
+
+
+def extract_with_trafilatura(markup: Union[str, bytes], url: str, encoding: Optional[str]) -> Optional[str]:
+    return trafilatura.extract(_decoded(markup, encoding))
+
+
+def extract_with_strategies(markup: Union[str, bytes], url: str, encoding: Optional[str]) -> Optional[str]:
+    # The json_ld extractor has already scanned the raw page for a schema.org articleBody
+    extraction = extract_article(markup, (urlparse(url).hostname or '').lower(), encoding=encoding,
+                                 structured_data=False)
+    return extraction.text if extraction else None
+
+
+def extract_with_paragraphs(markup: Union[str, bytes], url: str, encoding: Optional[str]) -> Optional[str]:
+    """Plain BeautifulSoup fallback: the paragraphs of the <article>, or of the whole page"""
+    soup = parse_html(markup, from_encoding=encoding if isinstance(markup, bytes) else None)
+
+    # Remove unwanted elements
+    for tag in soup(['script', 'style', 'header', 'footer', 'nav']):
+        tag.decompose()
+
+    # Try to find the main article content
+    article = soup.find('article')
+    if article:
+        paragraphs = article.find_all('p')
+    else:
+        # If no article tag, look for paragraphs in the body
+        paragraphs = soup.find_all('p')
+
+    # Extract text from paragraphs and clean up the whitespace
+    text = ' '.join([p.get_text().strip() for p in paragraphs])
+    return ' '.join(text.split())
+
+
+# Cheapest first, so a good early result can spare the expensive ones
+DEFAULT_EXTRACTORS = [
+    Extractor('json_ld', extract_with_json_ld, weight=1.0, budget=0.05),
+    Extractor('trafilatura', extract_with_trafilatura, weight=0.95, budget=1.0),
+    Extractor('strategies', extract_with_strategies, weight=0.9, budget=1.0),
+    Extractor('paragraphs', extract_with_paragraphs, weight=0.6, budget=0.5),
+]
+
+
+def quality_score(text: str) -> float:
+    """
+    Rough 0-1 rating of how much an extraction looks like article prose.
+
+    Rewards length (saturating at 400 words) and sentence structure (about one
+    sentence end per 25 words), so a menu or a run of headlines scores low even
+    when it is long.
+    """
+    words = text.split()
+    if len(words) < 20:
+        return 0.0
+    length = min(1.0, len(words) / 400)
+    sentences = len(SENTENCE_END_PATTERN.findall(text))
+    structure = min(1.0, sentences / (len(words) / 25))
+    return round(0.6 * length + 0.4 * structure, 4)
+
+
+class ExtractionPipeline:
+    """
+    Runs several extractors over one downloaded page and keeps the best result.
+
+    Each result is scored as extractor weight x quality_score. Extractors run in
+    order until one scores at least good_enough. Once a usable result exists, an
+    extractor is skipped if its budget would overrun total_budget. Python cannot
+    interrupt a running extractor, so budgets are planned, not enforced; overruns
+    are counted in stats().
+    """
+
+    def __init__(self, extractors: Optional[List[Extractor]] = None, total_budget: float = 2.0,
+                 good_enough: float = 0.85):
+        """
+        Args:
+            extractors: Extractors in the order to try them, DEFAULT_EXTRACTORS if not given
+            total_budget: Seconds the pipeline should take for one page
+            good_enough: Score at which the remaining extractors are not tried
+        """
+        self.extractors = extractors if extractors is not None else DEFAULT_EXTRACTORS
+        self.total_budget = total_budget
+        self.good_enough = good_enough
+        self._counters = {e.name: {"runs": 0, "wins": 0, "failures": 0, "skipped": 0, "overruns": 0, "seconds": 0.0}
+                          for e in self.extractors}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, counter: str, amount: Union[int, float] = 1) -> None:
+        with self._lock:
+            self._counters[name][counter] += amount
+
+    def run(self, markup: Union[str, bytes], url: str = '', encoding: Optional[str] = None) -> Optional[Candidate]:
+        """
+        Extract article text from a page.
+
+        Args:
+            markup: The page HTML, as text or raw bytes
+            url: The URL the page was downloaded from
+            encoding: Encoding of the bytes, when markup is bytes and it is known
+
+        Returns:
+            The best scoring Candidate, or None if no extractor produced text
+        """
+        started = time.perf_counter()
+        best: Optional[Candidate] = None
+        for extractor in self.extractors:
+            elapsed = time.perf_counter() - started
+            if best is not None and elapsed + extractor.budget > self.total_budget:
+                logger.debug("Skipping %s extractor for %s, over the time budget", extractor.name, url)
+                self._count(extractor.name, 'skipped')
+                continue
+
+            run_started = time.perf_counter()
+            try:
+                text = extractor.extract(markup, url, encoding)
+            except Exception as e:
+                logger.warning("%s extractor failed for %s: %s", extractor.name, url, e)
+                text = None
+            run_time = time.perf_counter() - run_started
+            metrics.EXTRACTOR_SECONDS.observe(run_time, extractor=extractor.name)
+
+            self._count(extractor.name, 'runs')
+            self._count(extractor.name, 'seconds', run_time)
+            if run_time > extractor.budget:
+                self._count(extractor.name, 'overruns')
+            if not text:
+                self._count(extractor.name, 'failures')
+                continue
+
+            quality = quality_score(text)
+            candidate = Candidate(extractor.name, text, quality, round(quality * extractor.weight, 4), run_time)
+            if best is None or candidate.score > best.score:
+                best = candidate
+            if best.score >= self.good_enough:
+                break
+
+        if best is not None:
+            self._count(best.extractor, 'wins')
+            metrics.EXTRACTOR_WINS.inc(extractor=best.extractor)
+            logger.debug("Extracted %d chars from %s with %s (score %s)", len(best.text), url, best.extractor, best.score)
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-extractor counters for this process"""
+        with self._lock:
+            return {name: {**counters, "seconds": round(counters["seconds"], 3)}
+                    for name, counters in self._counters.items()}
+
+
+pipeline = ExtractionPipeline()
+
+
 def extract_text_from_url(url: str) -> Optional[str]:
     """
     Extract the main text content from a URL.
-    Uses trafilatura as primary extractor, falls back to BeautifulSoup if needed.
-    
+    The page is downloaded once and every extractor works on the same bytes.
+
     Args:
         url: The URL to extract text from
-        
+
     Returns:
         Extracted text or None if extraction failed
     """
     try:
-        # First try using trafilatura which is better at extracting main content
-        logger.debug(f"Attempting to extract text from {url} using trafilatura")
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            extracted_text = trafilatura.extract(downloaded)
-            if extracted_text:
-                logger.debug("Successfully extracted text using trafilatura")
-                return extracted_text
-        
-        # Fallback to BeautifulSoup if trafilatura fails
-        logger.debug("Trafilatura extraction failed, falling back to BeautifulSoup")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove unwanted elements
-        for tag in soup(['script', 'style', 'header', 'footer', 'nav']):
-            tag.decompose()
-        
-        # Try to find the main article content
-        article = soup.find('article')
-        if article:
-            paragraphs = article.find_all('p')
-        else:
-            # If no article tag, look for paragraphs in the body
-            paragraphs = soup.find_all('p')
-        
-        # Extract text from paragraphs
-        text = ' '.join([p.get_text().strip() for p in paragraphs])
-        
-        # Clean up the text - remove extra whitespace
-        text = ' '.join(text.split())
-        
-        if text:
-            logger.debug("Successfully extracted text using BeautifulSoup")
-            return text
-        else:
-            logger.warning("Failed to extract meaningful text from the URL")
-            return None
-            
+        # Downloads go through the page cache, so unchanged pages are only revalidated
+        page = fetch_page(url)
     except Exception as e:
-        logger.error(f"Error extracting text from URL: {str(e)}")
+        logger.error("Error extracting text from URL: %s", e)
+        return None
+    return extract_text_from_html(page.body, url, page.encoding)
+
+
+def extract_text_from_html(html: Union[str, bytes], url: str = '', encoding: Optional[str] = None) -> Optional[str]:
+    """
+    Extract the main text content from a downloaded page with the extraction pipeline.
+    This is the CPU-bound half of extract_text_from_url, the async API runs it in an executor.
+
+    Args:
+        html: The page HTML, as text or raw bytes
+        url: The URL the page was downloaded from
+        encoding: Encoding of the bytes, when html is bytes and it is known
+
+    Returns:
+        Extracted text or None if extraction failed
+    """
+    if not html:
+        return None
+    candidate = pipeline.run(html, url, encoding)
+    if candidate is None:
+        logger.warning("Failed to extract meaningful text from the URL")
         return None
+    return candidate.text
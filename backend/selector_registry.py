@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import soupsieve
+
+logger = logging.getLogger(__name__)
+
+# Registry shipped with the package: domain -> CSS selectors, most specific first
+DEFAULT_SELECTORS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_selectors.json')
+
+# A selector as written in the registry file, and its compiled form
+CompiledSelector = Tuple[str, soupsieve.SoupSieve]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'selectors')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.selectors: List[CompiledSelector] = []
+
+
+class SelectorRegistry:
+    """
+    Site-specific article selectors, loaded from a JSON file.
+
+    The file maps domains to lists of CSS selectors. Domains are stored in a
+    trie keyed on their labels in reverse (com -> bbc -> www), so a lookup costs
+    one step per label of the host name however many outlets are registered, and
+    matches the domain itself and all of its subdomains. Selectors are compiled
+    once when the file is loaded. The file is checked for changes at most every
+    check_interval seconds and reloaded in place; a file that fails to load is
+    logged and the previous registry stays in use.
+    """
+
+    def __init__(self, path: str = DEFAULT_SELECTORS_FILE, check_interval: float = 5.0):
+        """
+        Args:
+            path: JSON file mapping domains to lists of CSS selectors
+            check_interval: Seconds between checks of the file's modification time, 0 to never reload
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._root = _TrieNode()
+        self._domains = 0
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    @staticmethod
+    def _labels(domain: str) -> List[str]:
+        """Labels of a host name from the top-level domain down, ignoring a port and trailing dot"""
+        return domain.lower().split(':', 1)[0].strip('.').split('.')[::-1]
+
+    @staticmethod
+    def _validate(entries) -> None:
+        """
+        Check that a loaded registry maps domain names to lists of selectors.
+
+        Raises:
+            ValueError if it has any other shape
+        """
+        if not isinstance(entries, dict):
+            raise ValueError(f"expected an object mapping domains to selector lists, got {type(entries).__name__}")
+        for domain, selectors in entries.items():
+            if not isinstance(selectors, list) or not all(isinstance(selector, str) for selector in selectors):
+                raise ValueError(f"selectors for {domain} must be a list of strings")
+
+    def reload(self) -> bool:
+        """
+        Load the registry file and swap it in.
+
+        Returns:
+            True if the file was loaded, False if it could not be read or is malformed and the previous registry was kept
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as registry_file:
+                entries = json.load(registry_file)
+            self._validate(entries)
+        except (OSError, ValueError) as e:
+            logger.error("Could not load site selectors from %s: %s", self.path, e)
+            return False
+
+        root = _TrieNode()
+        for domain, selectors in entries.items():
+            node = root
+            for label in self._labels(domain):
+                node = node.children.setdefault(label, _TrieNode())
+            for selector in selectors:
+                try:
+                    node.selectors.append((selector, soupsieve.compile(selector)))
+                except soupsieve.SelectorSyntaxError as e:
+                    logger.warning("Skipping invalid selector %s for %s: %s", selector, domain, e)
+
+        with self._lock:
+            self._root, self._domains, self._mtime = root, len(entries), mtime
+        logger.info("Loaded site selectors for %d domains from %s", len(entries), self.path)
+        return True
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not self.check_interval or now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            known = self._mtime
+        try:
+            changed = os.path.getmtime(self.path) != known
+        except OSError:
+            return
+        if changed:
+            self.reload()
+
+    def selectors_for(self, domain: str) -> List[CompiledSelector]:
+        """
+        Compiled selectors registered for a host name.
+
+        Args:
+            domain: Host name of the page, e.g. www.bbc.co.uk
+
+        Returns:
+            Selectors of every registered suffix of the host, the most specific domain's first
+        """
+        self._reload_if_changed()
+        node = self._root
+        matches = []
+        for label in self._labels(domain):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if node.selectors:
+                matches.append(node.selectors)
+        return [selector for selectors in reversed(matches) for selector in selectors]
+
+    def __len__(self) -> int:
+        return self._domains
+
+
+_registry: Optional[SelectorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def configure_selector_registry(path: str = DEFAULT_SELECTORS_FILE, check_interval: float = 5.0) -> SelectorRegistry:
+    """
+    Load the site selector registry used by the extractor.
+
+    Args:
+        path: JSON file mapping domains to lists of CSS selectors
+        check_interval: Seconds between checks of the file for changes, 0 to never reload
+
+    Returns:
+        The new SelectorRegistry
+    """
+    global _registry
+    registry = SelectorRegistry(path, check_interval)
+    with _registry_lock:
+        _registry = registry
+    return registry
+
+
+def get_selector_registry() -> SelectorRegistry:
+    """The registry in use, loaded from TRUTHSCAN_SITE_SELECTORS or the bundled file on first use"""
+    with _registry_lock:
+        registry = _registry
+    if registry is None:
+        registry = configure_selector_registry(os.environ.get('TRUTHSCAN_SITE_SELECTORS', DEFAULT_SELECTORS_FILE))
+    return registry
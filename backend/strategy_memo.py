@@ -0,0 +1,203 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyMemo:
+    """
+    Per-domain record of which extraction strategy works, learned from past pages.
+
+    Every successful extraction adds one to the score of its (strategy, detail)
+    pair for the domain, and a learned winner that fails to find enough text
+    loses one. Scores halve every half_life seconds, so a site that changes its
+    layout is relearned instead of being stuck with a stale winner. Scores are
+    kept in an SQLite database shared by every worker on the host: updates are
+    applied to the stored score inside a write transaction, so the learning of
+    all workers adds up, and each process caches a domain's scores for
+    refresh_after seconds before reading them again. Store failures are logged,
+    they never fail the extraction.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, half_life: float = 3 * 24 * 3600.0,
+                 min_score: float = 0.5, max_domains: int = 10000, refresh_after: float = 60.0):
+        """
+        Args:
+            db_path: Path of the shared SQLite database, or None for memory only
+            half_life: Seconds after which a score counts half
+            min_score: Decayed score a strategy needs to be tried first
+            max_domains: Domains kept in process memory, least recently used ones are dropped
+            refresh_after: Seconds a domain's scores are cached before they are read from the shared store again
+        """
+        self.db_path = db_path
+        self.half_life = half_life
+        self.min_score = min_score
+        self.max_domains = max_domains
+        self.refresh_after = refresh_after
+
+        # domain -> {(strategy, detail): (score, updated_at)}
+        self._domains: "OrderedDict[str, Dict[Tuple[str, str], Tuple[float, float]]]" = OrderedDict()
+        # domain -> time its scores were read from the shared store
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.lookups = 0
+        self.learned = 0
+        self.replay_successes = 0
+        self.replay_failures = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """SQLite connection for the current thread, created on first use"""
+        if not self.db_path:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=1.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS strategies ('
+                'domain TEXT NOT NULL, strategy TEXT NOT NULL, detail TEXT NOT NULL, '
+                'score REAL NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (domain, strategy, detail))'
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def domain_key(domain: str) -> str:
+        """Memo key for a host name: lowercased, without a leading www."""
+        domain = domain.lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+
+    def _scores(self, domain: str) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        """Scores of a domain, read from the shared store on first use and again once refresh_after has passed"""
+        now = time.time()
+        with self._lock:
+            scores = self._domains.get(domain)
+            if scores is not None and (not self.db_path or now - self._loaded_at.get(domain, 0.0) < self.refresh_after):
+                self._domains.move_to_end(domain)
+                return scores
+
+        try:
+            connection = self._connection()
+            if connection is not None:
+                rows = connection.execute(
+                    'SELECT strategy, detail, score, updated_at FROM strategies WHERE domain = ?', (domain,)
+                ).fetchall()
+                scores = {(row[0], row[1]): (row[2], row[3]) for row in rows}
+        except sqlite3.Error as e:
+            logger.warning("Strategy memo lookup failed for %s: %s", domain, e)
+
+        with self._lock:
+            if scores is None:
+                scores = self._domains.setdefault(domain, {})
+            else:
+                self._domains[domain] = scores
+            self._loaded_at[domain] = now
+            self._domains.move_to_end(domain)
+            while len(self._domains) > self.max_domains:
+                evicted, _ = self._domains.popitem(last=False)
+                self._loaded_at.pop(evicted, None)
+            return scores
+
+    def best(self, domain: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        The strategy to try first for a domain.
+
+        Returns:
+            (strategy, detail) with the highest decayed score, or None if nothing
+            has reached min_score yet
+        """
+        scores = self._scores(self.domain_key(domain))
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            ranked = [(self._decayed(score, updated_at, now), key) for key, (score, updated_at) in scores.items()]
+            if not ranked:
+                return None
+            score, (strategy, detail) = max(ranked)
+            if score < self.min_score:
+                return None
+            self.learned += 1
+        return strategy, detail or None
+
+    def record_success(self, domain: str, strategy: str, detail: Optional[str] = None,
+                       replayed: bool = False) -> None:
+        """Credit the strategy (and selector or class name) that extracted a page"""
+        self._update(domain, strategy, detail, 1.0)
+        if replayed:
+            with self._lock:
+                self.replay_successes += 1
+
+    def record_failure(self, domain: str, strategy: str, detail: Optional[str] = None) -> None:
+        """Penalise a learned winner that did not find enough text"""
+        self._update(domain, strategy, detail, -1.0)
+        with self._lock:
+            self.replay_failures += 1
+
+    def _update(self, domain: str, strategy: str, detail: Optional[str], delta: float) -> None:
+        domain = self.domain_key(domain)
+        key = (strategy, detail or '')
+        scores = self._scores(domain)
+        now = time.time()
+        with self._lock:
+            score, updated_at = scores.get(key, (0.0, now))
+            score = max(0.0, self._decayed(score, updated_at, now) + delta)
+            scores[key] = (score, now)
+
+        try:
+            connection = self._connection()
+            if connection is not None:
+                stored = self._apply_to_store(connection, domain, key, delta, now)
+                with self._lock:
+                    scores[key] = (stored, now)
+        except sqlite3.Error as e:
+            logger.warning("Strategy memo write failed for %s: %s", domain, e)
+
+    def _apply_to_store(self, connection: sqlite3.Connection, domain: str, key: Tuple[str, str],
+                        delta: float, now: float) -> float:
+        """
+        Add delta to the stored score, read and written in one write transaction
+        so that concurrent updates from other workers are not overwritten.
+
+        Returns:
+            The new stored score
+        """
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT score, updated_at FROM strategies WHERE domain = ? AND strategy = ? AND detail = ?',
+                (domain, key[0], key[1])
+            ).fetchone()
+            score = max(0.0, (self._decayed(row[0], row[1], now) if row else 0.0) + delta)
+            connection.execute(
+                'INSERT OR REPLACE INTO strategies (domain, strategy, detail, score, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)', (domain, key[0], key[1], score, now)
+            )
+            connection.commit()
+        except sqlite3.Error:
+            connection.rollback()
+            raise
+        return score
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup and replay counters for this process"""
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "learned": self.learned,
+                "replay_successes": self.replay_successes,
+                "replay_failures": self.replay_failures,
+                "memory_domains": len(self._domains),
+                "half_life": self.half_life,
+                "shared_store": self.db_path,
+            }
@@ -0,0 +1,235 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+
+from . import metrics
+
+# Id of the request being handled, attached to every record logged while handling it
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra= and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+# The listener started by configure_logging(), stopped on reconfiguration and at exit,
+# and the handler feeding it
+_listener: Optional[QueueListener] = None
+_handler: Optional['LazyQueueHandler'] = None
+_listener_lock = threading.Lock()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """The id to use for a request: the caller's X-Request-ID if it is sane, otherwise a fresh one"""
+    if incoming and len(incoming) <= 64 and incoming.replace('-', '').replace('_', '').isalnum():
+        return incoming
+    return uuid.uuid4().hex
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Per-logger sample rates from a 'logger=rate,logger=rate' string, e.g.
+    'backend.extractor=0.1,main=0.5'.
+
+    Raises:
+        ValueError if an entry is malformed or a rate is outside 0-1
+    """
+    rates = {}
+    for entry in (spec or '').split(','):
+        if not entry.strip():
+            continue
+        name, _, rate = entry.partition('=')
+        value = float(rate)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"Sample rate for {name.strip()} must be between 0 and 1, not {value}")
+        rates[name.strip()] = value
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id while still on the thread that logged them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING from chosen loggers.
+
+    A rate set for a logger also applies to its children, the most specific
+    name wins. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float], seed: Optional[int] = None):
+        super().__init__()
+        self.rates = rates
+        self._random = random.Random(seed)
+        self._cache: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or self._random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the request id and any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous plain-text layout, with the request id added"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'request_id'):
+            record.request_id = None
+        return super().format(record)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without formatting them.
+
+    The stock QueueHandler formats the message in the logging thread so the
+    record can be pickled; records here stay in-process, so getMessage() and the
+    formatter run on the listener thread instead. Arguments are therefore read
+    when the record is written, not when it is logged. When the queue is full
+    the record is dropped and counted rather than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json', sample_rates: Optional[Dict[str, float]] = None,
+                      stream: Optional[TextIO] = None, queue_size: int = 10000) -> LazyQueueHandler:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Replaces the handlers of the root logger with one LazyQueueHandler, which
+    stamps the request id, applies per-logger sampling and queues the record;
+    a QueueListener thread formats and writes it. Calling it again replaces the
+    previous setup.
+
+    Args:
+        level: Root log level name
+        fmt: 'json' for one JSON object per line, 'text' for the plain layout
+        sample_rates: Fraction of records below WARNING kept per logger name, all kept if not listed
+        stream: Where records are written, sys.stderr if not given
+        queue_size: Records waiting to be written at most, further ones are dropped
+
+    Returns:
+        The installed queue handler, whose dropped attribute counts lost records
+    """
+    global _listener
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    handler = LazyQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(RequestIdFilter())
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    global _handler
+    root = logging.getLogger()
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        _listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+        _listener.start()
+        _handler = handler
+    return handler
+
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the writer thread"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _restart_in_child() -> None:
+    """
+    Give a forked child its own queue and writer thread.
+
+    A pre-forking server (e.g. gunicorn --preload) forks after the app module
+    configured logging. The child inherits the queue but not the listener
+    thread, so without this its records would be queued and never written.
+    Records the parent had not written yet are left to the parent.
+    """
+    global _listener, _listener_lock
+    _listener_lock = threading.Lock()
+    if _listener is None or _handler is None:
+        return
+    _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+    _handler.dropped = 0
+    _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(stop_logging)
+
+metrics.counter_function('truthscan_log_records_dropped_total', 'Log records dropped because the log queue was full',
+                         lambda: {(): _handler.dropped if _handler is not None else 0})
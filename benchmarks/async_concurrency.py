@@ -0,0 +1,68 @@
+"""
+Throughput of the FastAPI /verify endpoint as the number of in-flight requests grows.
+
+Runs the app in-process through httpx's ASGI transport against a local stub publisher
+with a fixed response latency. With a non-blocking verify path, throughput should grow
+roughly linearly with concurrency until the executor or CPU saturates.
+
+Usage:
+    python -m benchmarks.async_concurrency [--latency 0.2] [--requests 64] [--levels 1,2,4,8,16,32]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubNewsServer
+
+
+async def run_level(client: httpx.AsyncClient, base_url: str, concurrency: int, total: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            # Distinct URLs so every request really goes to the publisher
+            response = await client.post('/verify', json={"url": f"{base_url}/article/{concurrency}/{i}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Keep the benchmark away from the real page cache
+    os.environ.setdefault('TRUTHSCAN_PAGE_CACHE_DIR', tempfile.mkdtemp(prefix='truthscan_bench_'))
+    from backend.app import app
+
+    levels = [int(level) for level in args.levels.split(',')]
+    with StubNewsServer(page_size=args.page_size, latency=args.latency) as stub:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://app', timeout=120) as client:
+            for concurrency in levels:
+                print(json.dumps(await run_level(client, stub.base_url, concurrency, args.requests)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latency', type=float, default=0.2, help='publisher latency in seconds')
+    parser.add_argument('--page-size', type=int, default=20000, help='page size in bytes')
+    parser.add_argument('--requests', type=int, default=64, help='requests per concurrency level')
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help='comma-separated concurrency levels')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+Compare charset detection against requests' apparent_encoding.
+
+apparent_encoding runs the statistical detector over the whole body, which is
+what response.text falls back to when the server sends no charset. For every
+page the report shows that cost next to backend.encoding.detect_encoding, which
+checks the BOM, the Content-Type header and the <meta> declaration before
+sniffing a bounded sample, along with the source it used and whether both
+decode the page to the same text.
+
+Usage:
+    python -m benchmarks.charset_detection [--pages DIR] [--repeat 3]
+"""
+import argparse
+import glob
+import json
+import os
+
+from requests.compat import chardet
+
+from backend.encoding import detect_encoding
+from benchmarks.parser_backends import best_time
+from benchmarks.synthetic import mixed_script_page
+
+
+def load_pages(directory: str) -> dict:
+    """Saved .html files from a directory as raw bytes, keyed by file name, with no Content-Type"""
+    loaded = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as page:
+            loaded[os.path.basename(path)] = (page.read(), None)
+    return loaded
+
+
+def synthetic_pages() -> dict:
+    """Encoded pages covering each detection source, as (body, Content-Type header)"""
+    large = 2_000_000
+    return {
+        'mixed_utf8_header': (mixed_script_page(large).encode('utf-8'), 'text/html; charset=utf-8'),
+        'mixed_utf8_meta': (mixed_script_page(large, charset='utf-8').encode('utf-8'), 'text/html'),
+        'mixed_utf8_undeclared': (mixed_script_page(large).encode('utf-8'), None),
+        'urdu_cp1256_meta': (mixed_script_page(large, charset='windows-1256', urdu_only=True).encode('cp1256', 'xmlcharrefreplace'),
+                             'text/html'),
+        'mixed_utf8_small': (mixed_script_page(20000).encode('utf-8'), None),
+    }
+
+
+def decode(body: bytes, encoding: str) -> str:
+    return body.decode(encoding or 'utf-8', errors='replace')
+
+
+def main(args: argparse.Namespace) -> None:
+    pages = load_pages(args.pages) if args.pages else synthetic_pages()
+
+    for name, (body, content_type) in pages.items():
+        apparent = chardet.detect(body)['encoding']
+        encoding, source = detect_encoding(body, content_type)
+        print(json.dumps({
+            "page": name,
+            "bytes": len(body),
+            "apparent_encoding": apparent,
+            "apparent_ms": round(best_time(lambda: chardet.detect(body), args.repeat) * 1000, 1),
+            "detected": encoding,
+            "source": source,
+            "detect_ms": round(best_time(lambda: detect_encoding(body, content_type), args.repeat) * 1000, 3),
+            "same_text": decode(body, apparent) == decode(body, encoding),
+        }))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', help='directory of saved .html pages (default: synthetic pages)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions, the best one is reported')
+    main(parser.parse_args())
@@ -0,0 +1,338 @@
+"""
+Per-stage timings of extraction and scoring over a synthetic news page corpus.
+
+Runs without network access. The corpus in benchmarks/corpus is hand-written:
+small (1-4 KB) pages shaped after the markup of real news sites (schema.org
+JSON-LD, site-specific containers, a live blog, a legacy cp1252 page without a
+charset) and plain-text articles, plus huge pathological pages generated by
+benchmarks.synthetic. It is not a recording of real articles, so the timings
+show relative costs and regressions rather than production latency.
+
+Every page goes through each stage on its own: charset detection and decoding,
+parsing, DOM indexing, every extraction strategy, each extractor of the backend
+scraper pipeline, and scoring of the extracted text. The plain-text articles
+are scored on their own.
+
+End-to-end runs then give throughput and peak traced allocation for the two
+extraction paths: 'strategies' (extract_article with a strategy memo, as the
+Flask app extracts) and 'pipeline' (the backend scraper pipeline), both scored
+by backend.detector. tracemalloc only sees Python allocations, so memory held by
+lxml is not included; the process peak RSS is reported as well.
+
+Only backend modules are imported, never main.py, so no instance directories
+are created and logging is left alone. Stages whose modules do not exist in
+the measured tree are reported as null, so with --tree the same script can
+time an older checkout, e.g. one made with git worktree, and --compare the two
+reports.
+
+Usage:
+    python -m benchmarks.corpus_stages [--repeat 3] [--output report.json] [--compare baseline.json]
+    python -m benchmarks.corpus_stages --tree /tmp/truthscan-baseline --output baseline.json
+"""
+import argparse
+import importlib
+import inspect
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from benchmarks import synthetic
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+# Names the stages use, by backend module; any that a tree lacks are None and their stages are skipped
+BACKEND_NAMES = {
+    'backend.detector': ['detect_fake_news'],
+    'backend.encoding': ['detect_encoding'],
+    'backend.extractor': ['AD_CLASSES', 'CLEANED_STRATEGIES', 'LAST_RESORT_STRATEGIES', 'PRIMARY_STRATEGIES',
+                          'UNWANTED_TAGS', 'DomIndex', 'ExtractionContext', 'extract_article', 'json_ld_fast_path',
+                          'strategy_liveblog'],
+    'backend.html_parser': ['default_backend', 'parse_html'],
+    'backend.model_loader': ['memory_usage'],
+    'backend.scraper': ['pipeline'],
+    'backend.strategy_memo': ['StrategyMemo'],
+}
+
+
+def import_backend(tree: str = None) -> SimpleNamespace:
+    """
+    The backend names the stages use, imported from this checkout or from another tree.
+
+    Returns:
+        A namespace with one attribute per name in BACKEND_NAMES, None where the tree does not have it
+    """
+    if tree:
+        # backend/ is a namespace package, so this checkout must leave the path or its modules would fill the gaps
+        here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        sys.path[:] = [os.path.abspath(tree)] + [path for path in sys.path if os.path.abspath(path or '.') != here]
+    found = {}
+    for module_name, names in BACKEND_NAMES.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            module = None
+        for name in names:
+            found[name] = getattr(module, name, None)
+    return SimpleNamespace(**found)
+
+
+def load_corpus(directory: str, generated: bool = True) -> tuple:
+    """
+    Pages and texts of a corpus directory.
+
+    Returns:
+        (pages, texts): pages as dicts with name, kind, url, content_type and
+        body bytes; texts as (name, text) pairs
+    """
+    with open(os.path.join(directory, 'manifest.json')) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    pages = []
+    for entry in manifest.get('pages', []):
+        with open(os.path.join(directory, entry['file']), 'rb') as page:
+            body = page.read()
+        pages.append({"name": os.path.basename(entry['file']), "kind": entry['kind'], "url": entry['url'],
+                      "content_type": entry.get('content_type'), "body": body})
+    if generated:
+        for entry in manifest.get('generated', []):
+            body = getattr(synthetic, entry['generator'])(**entry.get('args', {})).encode('utf-8')
+            pages.append({"name": entry['name'], "kind": entry['kind'], "url": entry['url'],
+                          "content_type": 'text/html', "body": body})
+
+    texts = []
+    for path in manifest.get('texts', []):
+        with open(os.path.join(directory, path), encoding='utf-8') as text_file:
+            texts.append((os.path.basename(path), text_file.read().strip()))
+    return pages, texts
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def page_encoding(b: SimpleNamespace, page: dict) -> tuple:
+    """(encoding, source) of a page, UTF-8 where the tree cannot detect it"""
+    if b.detect_encoding is None:
+        return 'utf-8', 'assumed'
+    return b.detect_encoding(page['body'], page['content_type'])
+
+
+def run_strategies(b: SimpleNamespace, page: dict, encoding: str, memo) -> tuple:
+    """The Flask app's extraction for a downloaded page, with the strategy memo, then scoring"""
+    if b.extract_article is None:
+        return None, None
+    kwargs = {'encoding': encoding}
+    if memo is not None and 'memo' in inspect.signature(b.extract_article).parameters:
+        kwargs['memo'] = memo
+    extraction = b.extract_article(page['body'], page['domain'], **kwargs)
+    if not extraction:
+        return None, None
+    return extraction, b.detect_fake_news(extraction.text)
+
+
+def run_pipeline(b: SimpleNamespace, page: dict, encoding: str) -> tuple:
+    """The backend scraper pipeline for a downloaded page, then scoring"""
+    if b.pipeline is None:
+        return None, None
+    candidate = b.pipeline.run(page['body'], page['url'], encoding)
+    if candidate is None:
+        return None, None
+    return candidate, b.detect_fake_news(candidate.text)
+
+
+def peak_allocation(func) -> int:
+    """Peak bytes allocated through Python while func runs"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stage_timings(b: SimpleNamespace, page: dict, encoding: str, repeat: int) -> dict:
+    """Best time in milliseconds of every stage the tree has, run one at a time on the page"""
+    body, url = page['body'], page['url']
+    stages = {
+        "detect_encoding": ms(best_time(lambda: b.detect_encoding(body, page['content_type']), repeat))
+        if b.detect_encoding else None,
+        "decode": ms(best_time(lambda: body.decode(encoding, errors='replace'), repeat)),
+        "json_ld_fast_path": ms(best_time(lambda: b.json_ld_fast_path(body, encoding), repeat))
+        if b.json_ld_fast_path else None,
+        "parse": ms(best_time(lambda: b.parse_html(body, from_encoding=encoding), repeat)) if b.parse_html else None,
+    }
+
+    if b.parse_html and b.DomIndex and b.ExtractionContext and b.PRIMARY_STRATEGIES is not None:
+        soup = b.parse_html(body, from_encoding=encoding)
+        stages["index"] = ms(best_time(lambda: b.DomIndex(soup), repeat))
+        ctx = b.ExtractionContext(soup=soup, index=b.DomIndex(soup), domain=page['domain'])
+        ctx.json_ld = [script.string for script in ctx.index.by_tag('script')
+                       if script.get('type') == 'application/ld+json' and script.string]
+        for name, strategy in b.PRIMARY_STRATEGIES:
+            stages[f"strategy.{name}"] = ms(best_time(lambda: strategy(ctx), repeat))
+
+        # Removal changes the tree, so it is timed once
+        started = time.perf_counter()
+        ctx.index.remove_unwanted(b.UNWANTED_TAGS, b.AD_CLASSES)
+        stages["clean"] = ms(time.perf_counter() - started)
+        cleaned = [('liveblog', b.strategy_liveblog)] + (b.CLEANED_STRATEGIES or []) + (b.LAST_RESORT_STRATEGIES or [])
+        for name, strategy in cleaned:
+            stages[f"strategy.{name}"] = ms(best_time(lambda: strategy(ctx), repeat))
+
+    if b.pipeline is not None:
+        for extractor in b.pipeline.extractors:
+            stages[f"extractor.{extractor.name}"] = ms(best_time(lambda: extractor.extract(body, url, encoding),
+                                                                 repeat))
+
+    extraction, _ = run_strategies(b, page, encoding, None)
+    if extraction:
+        stages["score"] = ms(best_time(lambda: b.detect_fake_news(extraction.text), repeat))
+    return stages
+
+
+def git_commit(tree: str) -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=tree, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, threshold: float, min_delta_ms: float) -> None:
+    """Print the stages that changed by more than threshold (a fraction) and min_delta_ms, and the throughput"""
+    baseline_pages = {page['page']: page for page in baseline.get('pages', [])}
+    for page in report['pages']:
+        before = baseline_pages.get(page['page'])
+        if before is None:
+            continue
+        for stage, current in page['stages_ms'].items():
+            previous = before['stages_ms'].get(stage)
+            if not previous or current is None or abs(current - previous) / previous <= threshold or \
+                    abs(current - previous) < min_delta_ms:
+                continue
+            print(json.dumps({"compare": "stage", "page": page['page'], "stage": stage, "baseline_ms": previous,
+                              "ms": current, "change": f"{(current - previous) / previous:+.0%}"}))
+    for implementation, figures in report['throughput'].items():
+        previous = (baseline.get('throughput', {}).get(implementation) or {}).get('pages_per_second')
+        if previous and figures:
+            current = figures['pages_per_second']
+            print(json.dumps({"compare": "throughput", "implementation": implementation,
+                              "baseline_pages_per_second": previous, "pages_per_second": current,
+                              "change": f"{(current - previous) / previous:+.0%}"}))
+
+
+def main(args: argparse.Namespace) -> None:
+    # Extraction logs every page at INFO; keep the timings about the work itself
+    logging.disable(logging.CRITICAL)
+    b = import_backend(args.tree)
+    tree = os.path.abspath(args.tree) if args.tree else os.path.dirname(os.path.dirname(CORPUS_DIR))
+
+    pages, texts = load_corpus(args.corpus, generated=not args.skip_generated)
+    report = {
+        "commit": git_commit(tree),
+        "python": platform.python_version(),
+        "parser": b.default_backend() if b.default_backend else None,
+        "repeat": args.repeat,
+        "pages": [],
+        "texts": [],
+    }
+
+    memo = b.StrategyMemo(db_path=None) if b.StrategyMemo else None
+    for page in pages:
+        page['domain'] = (urlparse(page['url']).hostname or '').lower()
+        encoding, source = page_encoding(b, page)
+        # The first run warms the strategy memo, like earlier pages from the same site would
+        strategies_extraction, _ = run_strategies(b, page, encoding, memo)
+        pipeline_candidate, _ = run_pipeline(b, page, encoding)
+        result = {
+            "page": page['name'],
+            "kind": page['kind'],
+            "bytes": len(page['body']),
+            "encoding": encoding,
+            "encoding_source": source,
+            "stages_ms": stage_timings(b, page, encoding, args.repeat),
+            "strategies": {
+                "strategy": strategies_extraction.strategy if strategies_extraction else None,
+                "chars": len(strategies_extraction.text) if strategies_extraction else 0,
+                "ms": ms(best_time(lambda: run_strategies(b, page, encoding, memo), args.repeat)),
+                "peak_alloc_bytes": peak_allocation(lambda: run_strategies(b, page, encoding, memo)),
+            } if b.extract_article else None,
+            "pipeline": {
+                "extractor": pipeline_candidate.extractor if pipeline_candidate else None,
+                "chars": len(pipeline_candidate.text) if pipeline_candidate else 0,
+                "ms": ms(best_time(lambda: run_pipeline(b, page, encoding), args.repeat)),
+                "peak_alloc_bytes": peak_allocation(lambda: run_pipeline(b, page, encoding)),
+            } if b.pipeline else None,
+        }
+        report['pages'].append(result)
+        print(json.dumps(result))
+
+    for name, text in texts:
+        result = {
+            "text": name,
+            "words": len(text.split()),
+            "score_ms": ms(best_time(lambda: b.detect_fake_news(text), args.repeat)),
+        }
+        report['texts'].append(result)
+        print(json.dumps(result))
+
+    total_bytes = sum(len(page['body']) for page in pages)
+    report['throughput'] = {}
+    for implementation, available, run in (
+            ('strategies', b.extract_article, lambda page, encoding: run_strategies(b, page, encoding, memo)),
+            ('pipeline', b.pipeline, lambda page, encoding: run_pipeline(b, page, encoding))):
+        if available is None:
+            report['throughput'][implementation] = None
+            continue
+        encodings = [page_encoding(b, page)[0] for page in pages]
+        started = time.perf_counter()
+        for page, encoding in zip(pages, encodings):
+            run(page, encoding)
+        elapsed = time.perf_counter() - started
+        report['throughput'][implementation] = {
+            "pages": len(pages),
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(len(pages) / elapsed, 2),
+            "mb_per_second": round(total_bytes / elapsed / 1e6, 2),
+        }
+    report['memory'] = b.memory_usage() if b.memory_usage else None
+    print(json.dumps({"throughput": report['throughput'], "memory": report['memory']}))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            compare(report, json.load(baseline_file), args.threshold, args.min_delta_ms)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--corpus', default=CORPUS_DIR, help='corpus directory with a manifest.json')
+    parser.add_argument('--tree', help='checkout whose backend/ is measured instead of this one')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions, the best one is reported')
+    parser.add_argument('--skip-generated', action='store_true', help='leave out the generated huge pages')
+    parser.add_argument('--output', help='write the full report to this JSON file')
+    parser.add_argument('--compare', help='report of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change in a stage time worth reporting with --compare')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='smaller changes in a stage time are timer noise and not reported')
+    main(parser.parse_args())
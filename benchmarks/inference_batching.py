@@ -0,0 +1,88 @@
+"""
+Measure transformer detector throughput with and without micro-batching.
+
+Texts of varied length are classified first one at a time with batch size 1,
+then by N concurrent callers through the MicroBatcher, for each concurrency
+level. The report shows items per second, per-item latency percentiles and the
+mean batch size that formed. Needs transformers and torch installed.
+
+Usage:
+    python -m benchmarks.inference_batching [--items 256] [--concurrency 1 4 16 64]
+"""
+import argparse
+import json
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.batching import MicroBatcher
+from backend.detector import load_model, model_based_fake_news_detection, model_based_fake_news_detection_batch
+from benchmarks.synthetic import PARAGRAPH
+
+
+def texts(count: int, seed: int = 0) -> list:
+    """Article texts of 1 to 12 paragraphs"""
+    sentence = re.sub(r'<[^>]+>', '', PARAGRAPH)
+    rng = random.Random(seed)
+    return [' '.join([sentence] * rng.randint(1, 12)) for _ in range(count)]
+
+
+def percentiles(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {f"p{p}": round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+            for p in (50, 95, 99)}
+
+
+def run_sequential(items: list, model, tokenizer) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for text in items:
+        start = time.perf_counter()
+        model_based_fake_news_detection(text, model, tokenizer)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    return {"mode": "batch_size_1", "concurrency": 1, "items_per_second": round(len(items) / elapsed, 2),
+            "latency_ms": percentiles(latencies)}
+
+
+def run_batched(items: list, model, tokenizer, concurrency: int, max_batch_size: int, max_wait_ms: float) -> dict:
+    batcher = MicroBatcher(lambda batch: model_based_fake_news_detection_batch(batch, model, tokenizer),
+                           max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def call(text):
+        start = time.perf_counter()
+        batcher(text)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, items))
+    elapsed = time.perf_counter() - started
+    stats = batcher.stats()
+    batcher.close()
+    return {"mode": "micro_batched", "concurrency": concurrency, "items_per_second": round(len(items) / elapsed, 2),
+            "latency_ms": percentiles(latencies), "mean_batch_size": stats["mean_batch_size"]}
+
+
+def main(args: argparse.Namespace) -> None:
+    model, tokenizer = load_model()
+    if model is None:
+        raise SystemExit("The model could not be loaded, see the log above")
+    items = texts(args.items)
+
+    # One untimed pass so lazy initialisation does not count against the first run
+    model_based_fake_news_detection(items[0], model, tokenizer)
+
+    print(json.dumps(run_sequential(items, model, tokenizer)))
+    for concurrency in args.concurrency:
+        print(json.dumps(run_batched(items, model, tokenizer, concurrency, args.max_batch_size, args.max_wait_ms)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=256, help='texts classified per run')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64], help='concurrent callers')
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    parser.add_argument('--max-wait-ms', type=float, default=10.0)
+    main(parser.parse_args())
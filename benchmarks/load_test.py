@@ -0,0 +1,244 @@
+"""
+End-to-end load test of the verify endpoints against a local stub publisher.
+
+Starts a StubNewsServer with the given page size, latency, error rate and ETag
+behaviour, starts the app under test on a local port (the Flask app on
+Werkzeug's threaded server, or the FastAPI app on uvicorn) and drives its
+verify endpoint with article URLs on the stub. No real publisher is contacted.
+
+Load is applied in steps, either as a fixed number of requests in flight
+(closed loop, --concurrency) or as a fixed arrival rate (open loop, --rates).
+In the open loop latency counts from the moment a request was due, so a server
+that falls behind shows it in the percentiles instead of slowing the load down.
+Each step reports throughput, p50/p95/p99 latency and errors by kind. The step
+at which the server saturates is reported at the end: throughput stops
+growing, the p99 exceeds --slo-ms, or the error rate exceeds --max-error-rate.
+
+Usage:
+    python -m benchmarks.load_test --server fastapi [--concurrency 1,4,16,64] [--latency 0.1]
+    python -m benchmarks.load_test --server flask --rates 5,10,20,40 [--duration 10]
+    python -m benchmarks.load_test --target http://127.0.0.1:8000/verify [--concurrency 8,32]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from benchmarks.stub_server import StubNewsServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Path of the verify endpoint of each app
+ENDPOINTS = {'flask': '/api/verify', 'fastapi': '/verify'}
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    """Start the app under test in a child process, with its page cache in a scratch directory"""
+    env = dict(os.environ, TRUTHSCAN_PAGE_CACHE_DIR=tempfile.mkdtemp(prefix='truthscan_load_'))
+    if mode == 'flask':
+        command = [sys.executable, '-c',
+                   f"from main import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'backend.app:app', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--log-level', 'warning']
+    return subprocess.Popen(command, cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before accepting requests")
+        try:
+            httpx.get(base_url + '/', timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout} seconds")
+
+
+def percentiles(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    summary = {f"p{p}": round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+               for p in (50, 95, 99)}
+    summary["max"] = round(latencies[-1] * 1000, 1)
+    return summary
+
+
+class LoadRun:
+    """Sends verify requests for stub article URLs and records how each one went"""
+
+    def __init__(self, client: httpx.AsyncClient, endpoint: str, stub_url: str, url_pool: int):
+        self.client = client
+        self.endpoint = endpoint
+        self.stub_url = stub_url
+        self.url_pool = url_pool
+        self.sent = 0
+
+    def next_url(self) -> str:
+        self.sent += 1
+        # Distinct URLs reach the publisher every time; a small pool exercises the page cache and ETags
+        number = self.sent % self.url_pool if self.url_pool else self.sent
+        return f"{self.stub_url}/article/{number}"
+
+    async def one(self, started: float, latencies: list, outcomes: Counter) -> None:
+        try:
+            response = await self.client.post(self.endpoint, json={"url": self.next_url()})
+            outcome = 'ok' if response.status_code == 200 else f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            outcome = 'timeout'
+        except httpx.TransportError:
+            outcome = 'connection_error'
+        latencies.append(time.perf_counter() - started)
+        outcomes[outcome] += 1
+
+
+def step_result(load: str, level: float, elapsed: float, latencies: list, outcomes: Counter) -> dict:
+    total = sum(outcomes.values())
+    errors = total - outcomes['ok']
+    return {
+        "load": load,
+        "level": level,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(outcomes['ok'] / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "outcomes": dict(outcomes),
+    }
+
+
+async def closed_loop(run: LoadRun, concurrency: int, duration: float) -> dict:
+    """`concurrency` workers each sending their next request as soon as the last one is answered"""
+    latencies, outcomes = [], Counter()
+    started = time.perf_counter()
+    stop_at = started + duration
+
+    async def worker():
+        while time.perf_counter() < stop_at:
+            await run.one(time.perf_counter(), latencies, outcomes)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return step_result('concurrency', concurrency, time.perf_counter() - started, latencies, outcomes)
+
+
+async def open_loop(run: LoadRun, rate: float, duration: float) -> dict:
+    """Requests started at a fixed rate whether or not earlier ones have been answered"""
+    latencies, outcomes = [], Counter()
+    started = time.perf_counter()
+    tasks = []
+    for i in range(int(rate * duration)):
+        due = started + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(run.one(due, latencies, outcomes)))
+    await asyncio.gather(*tasks)
+    return step_result('rate', rate, time.perf_counter() - started, latencies, outcomes)
+
+
+def saturation(steps: list, slo_ms: float, max_error_rate: float) -> dict:
+    """The first step at which the server stopped keeping up, and why"""
+    best = 0.0
+    for step in steps:
+        p99 = step['latency_ms']['p99']
+        if step['error_rate'] > max_error_rate:
+            return {"saturated_at": step['level'], "reason": f"error rate {step['error_rate']:.1%}"}
+        if p99 is not None and p99 > slo_ms:
+            return {"saturated_at": step['level'], "reason": f"p99 {p99} ms over the {slo_ms} ms objective"}
+        if step['load'] == 'rate' and step['throughput_rps'] < 0.9 * step['level'] * (1 - step['error_rate']):
+            return {"saturated_at": step['level'], "reason": "throughput below the offered rate"}
+        if step['load'] == 'concurrency' and best and step['throughput_rps'] < 1.1 * best:
+            return {"saturated_at": step['level'], "reason": "throughput stopped growing"}
+        best = max(best, step['throughput_rps'])
+    return {"saturated_at": None, "reason": "kept up at every step"}
+
+
+async def drive(args: argparse.Namespace, base_url: str, endpoint: str, stub: StubNewsServer) -> list:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    steps = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        run = LoadRun(client, endpoint, stub.base_url, args.url_pool)
+        if args.warmup:
+            await closed_loop(run, 1, args.warmup)
+        if args.rates:
+            levels, step = [float(rate) for rate in args.rates.split(',')], open_loop
+        else:
+            levels, step = [int(level) for level in args.concurrency.split(',')], closed_loop
+        for level in levels:
+            before = stub.stats()
+            result = await step(run, level, args.duration)
+            after = stub.stats()
+            result["publisher"] = {key: after[key] - before[key] for key in after}
+            steps.append(result)
+            print(json.dumps({"server": args.server, **result}))
+    return steps
+
+
+def main(args: argparse.Namespace) -> None:
+    stub = StubNewsServer(page_size=args.page_size, latency=args.latency, error_rate=args.error_rate,
+                          etag=args.etag).start()
+    process: Optional[subprocess.Popen] = None
+    try:
+        if args.target:
+            parsed = urlsplit(args.target)
+            base_url, endpoint = f"{parsed.scheme}://{parsed.netloc}", parsed.path
+            args.server = 'external'
+        else:
+            port = free_port()
+            base_url, endpoint = f"http://127.0.0.1:{port}", ENDPOINTS[args.server]
+            process = start_server(args.server, port, args.workers)
+            wait_until_up(base_url, process)
+
+        steps = asyncio.run(drive(args, base_url, endpoint, stub))
+        print(json.dumps({"server": args.server, "summary": saturation(steps, args.slo_ms, args.max_error_rate),
+                          "max_throughput_rps": max((step['throughput_rps'] for step in steps), default=0.0)}))
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        stub.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=sorted(ENDPOINTS), default='fastapi', help='app to start and load')
+    parser.add_argument('--target', help='verify endpoint of an already running server, instead of starting one')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes for the FastAPI app')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32', help='comma-separated requests in flight per step')
+    parser.add_argument('--rates', help='comma-separated requests per second per step, instead of --concurrency')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per step')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of single requests before the first step')
+    parser.add_argument('--timeout', type=float, default=30.0, help='client timeout per request in seconds')
+    parser.add_argument('--url-pool', type=int, default=0,
+                        help='cycle through this many article URLs, 0 for a new URL on every request')
+    parser.add_argument('--page-size', type=int, default=20000, help='publisher page size in bytes')
+    parser.add_argument('--latency', type=float, default=0.1, help='publisher latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of publisher responses that are 503')
+    parser.add_argument('--etag', choices=StubNewsServer.ETAG_MODES, default='none', help='publisher ETag behaviour')
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help='p99 latency beyond which a step is saturated')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='error rate beyond which a step is saturated')
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+"""
+Check the ONNX Runtime engine against PyTorch on label agreement and speed.
+
+Every text is classified by the PyTorch model and by the ONNX engine (int8
+unless --fp32). The report gives the share of texts where both pick the same
+class and the same verdict, the largest probability difference, and the
+per-text latency of each engine. Needs torch, transformers and onnxruntime.
+
+Exits with status 1 when the engines disagree by more than quantization
+explains: label agreement below --min-agreement, or a probability difference
+above --max-diff (by default 0.001 for the fp32 model and 0.1 for int8).
+
+Usage:
+    python -m benchmarks.onnx_parity [--items 200] [--threads 4] [--fp32] [--min-agreement 0.95]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from backend.detector import MODEL_NAME, model_probabilities, verdict_from_probabilities
+from backend.onnx_engine import load_onnx_engine
+from benchmarks.inference_batching import texts
+
+
+def timed_probabilities(items: list, model, tokenizer) -> tuple:
+    rows = []
+    started = time.perf_counter()
+    for text in items:
+        rows.append(model_probabilities([text], model, tokenizer)[0])
+    return np.array(rows), (time.perf_counter() - started) / len(items)
+
+
+def main(args: argparse.Namespace) -> None:
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    torch_model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    engine = load_onnx_engine(MODEL_NAME, quantize=not args.fp32, intra_op_threads=args.threads)
+    items = texts(args.items, seed=1)
+
+    # Warm both up so one-off initialisation is not timed
+    model_probabilities(items[:1], torch_model, tokenizer)
+    model_probabilities(items[:1], engine, tokenizer)
+
+    torch_probs, torch_latency = timed_probabilities(items, torch_model, tokenizer)
+    onnx_probs, onnx_latency = timed_probabilities(items, engine, tokenizer)
+
+    same_class = np.argmax(torch_probs, axis=1) == np.argmax(onnx_probs, axis=1)
+    same_verdict = [verdict_from_probabilities(text, a)[0] == verdict_from_probabilities(text, b)[0]
+                    for text, a, b in zip(items, torch_probs, onnx_probs)]
+    label_agreement = float(same_class.mean())
+    max_diff = float(np.abs(torch_probs - onnx_probs).max())
+    print(json.dumps({
+        "items": len(items),
+        "onnx_model": engine.model_path,
+        "label_agreement": round(label_agreement, 4),
+        "verdict_agreement": round(sum(same_verdict) / len(items), 4),
+        "max_probability_diff": round(max_diff, 4),
+        "torch_ms": round(torch_latency * 1000, 1),
+        "onnx_ms": round(onnx_latency * 1000, 1),
+        "speedup": round(torch_latency / onnx_latency, 2),
+    }))
+
+    allowed_diff = args.max_diff if args.max_diff is not None else (0.001 if args.fp32 else 0.1)
+    failures = []
+    if label_agreement < args.min_agreement:
+        failures.append(f"label agreement {label_agreement:.4f} is below {args.min_agreement}")
+    if max_diff > allowed_diff:
+        failures.append(f"probability difference {max_diff:.4f} is above {allowed_diff}")
+    if failures:
+        print(f"ONNX engine does not match PyTorch: {'; '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=200, help='texts compared')
+    parser.add_argument('--threads', type=int, default=0, help='ONNX Runtime intra-op threads, 0 for its default')
+    parser.add_argument('--fp32', action='store_true', help='compare the unquantized ONNX model')
+    parser.add_argument('--min-agreement', type=float, default=0.95, help='lowest label agreement that passes')
+    parser.add_argument('--max-diff', type=float,
+                        help='largest probability difference that passes, 0.001 for fp32 and 0.1 for int8 by default')
+    main(parser.parse_args())
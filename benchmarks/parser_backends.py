@@ -0,0 +1,65 @@
+"""
+Compare HTML parser backends on extraction output and timing.
+
+For every page, each installed backend parses the page and runs the full
+extraction pipeline. The report shows parse and extraction time per backend and
+whether the extracted text matches the html.parser baseline.
+
+Usage:
+    python -m benchmarks.parser_backends [--pages DIR] [--repeat 3]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from backend.extractor import extract_article
+from backend.html_parser import available_backends, parse_html
+from benchmarks.synthetic import pages as synthetic_pages
+
+
+def load_pages(directory: str) -> dict:
+    """Saved .html files from a directory, keyed by file name"""
+    loaded = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as page:
+            loaded[os.path.basename(path)] = page.read().decode('utf-8', errors='replace')
+    return loaded
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(args: argparse.Namespace) -> None:
+    pages = load_pages(args.pages) if args.pages else synthetic_pages()
+    backends = available_backends()
+
+    for name, html in pages.items():
+        baseline = extract_article(html, 'example.com', parser='html.parser')
+        for backend in backends:
+            extraction = extract_article(html, 'example.com', parser=backend)
+            print(json.dumps({
+                "page": name,
+                "bytes": len(html),
+                "backend": backend,
+                "parse_ms": round(best_time(lambda: parse_html(html, backend), args.repeat) * 1000, 1),
+                "extract_ms": round(best_time(lambda: extract_article(html, 'example.com', parser=backend),
+                                              args.repeat) * 1000, 1),
+                "strategy": extraction.strategy if extraction else None,
+                "chars": len(extraction.text) if extraction else 0,
+                "same_as_html_parser": (extraction.text if extraction else None) == (baseline.text if baseline else None),
+            }))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', help='directory of saved .html pages (default: synthetic pages)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions, the best one is reported')
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+"""
+Local stand-in for a news publisher, used by the benchmarks so they never hit real sites.
+
+Serves a synthetic article page at any path. Response size, latency, error rate and
+ETag behaviour are configurable.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import article_page
+
+
+class StubNewsServer:
+    """
+    Threaded HTTP server on 127.0.0.1 serving synthetic articles.
+
+    Args:
+        page_size: Approximate size of each page in bytes
+        latency: Seconds to wait before answering each request
+        error_rate: Fraction of requests answered with 503 Service Unavailable
+        etag: 'none' to send no validator, 'static' for one ETag that conditional
+              requests match (answered 304), 'changing' for a new ETag on every response
+        seed: Seed of the random choice of failing requests
+    """
+
+    ETAG_MODES = ('none', 'static', 'changing')
+
+    def __init__(self, page_size: int = 20000, latency: float = 0.0, error_rate: float = 0.0,
+                 etag: str = 'none', seed: int = 0):
+        if etag not in self.ETAG_MODES:
+            raise ValueError(f"etag must be one of {self.ETAG_MODES}, not {etag!r}")
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.etag = etag
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._body = article_page(page_size).encode('utf-8')
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    request_number = stub.requests
+                    failed = stub.error_rate > 0 and stub._random.random() < stub.error_rate
+                    if failed:
+                        stub.errors += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if failed:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = None
+                if stub.etag == 'static':
+                    etag = '"article-v1"'
+                elif stub.etag == 'changing':
+                    etag = f'"article-{request_number}"'
+                if etag and self.headers.get('If-None-Match') == etag:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(stub._body)))
+                self.end_headers()
+                self.wfile.write(stub._body)
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stats(self) -> dict:
+        """Requests served so far, and how many of them failed or were answered 304"""
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "not_modified": self.not_modified}
+
+    def start(self) -> 'StubNewsServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubNewsServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,82 @@
+"""
+Synthetic news pages for the benchmarks, generated on demand so no network access is needed.
+"""
+
+PARAGRAPH = (
+    "<p>According to officials, the talks between the two delegations will continue next week, "
+    "the foreign ministry said in a statement on Tuesday. Analysts expect progress on trade.</p>"
+)
+
+
+def article_page(size: int = 20000) -> str:
+    """A plain article page of roughly `size` characters"""
+    count = max(1, size // len(PARAGRAPH))
+    return (
+        "<html><head><meta charset=\"utf-8\"><title>Synthetic article</title></head><body>"
+        "<nav><a href=\"/\">Home</a></nav><article><h1>Synthetic article</h1>"
+        + PARAGRAPH * count +
+        "</article><footer>Footer</footer></body></html>"
+    )
+
+
+# Hindi and Urdu news copy, for the pages that exercise charset detection
+HINDI_PARAGRAPH = (
+    "<p>अधिकारियों के अनुसार दोनों प्रतिनिधिमंडलों के बीच बातचीत अगले सप्ताह भी जारी रहेगी, "
+    "विदेश मंत्रालय ने मंगलवार को एक बयान में कहा।</p>"
+)
+URDU_PARAGRAPH = (
+    "<p>حکام کے مطابق دونوں وفود کے درمیان مذاکرات اگلے ہفتے بھی جاری رہیں گے، "
+    "وزارت خارجہ نے منگل کو ایک بیان میں کہا۔</p>"
+)
+
+
+def mixed_script_page(size: int = 20000, charset: str = None, urdu_only: bool = False) -> str:
+    """
+    An article of roughly `size` characters mixing English with Hindi and Urdu paragraphs.
+
+    Args:
+        size: Approximate length in characters
+        charset: Encoding to declare in a <meta> tag, none if not given
+        urdu_only: Leave out the Hindi paragraphs, for single-byte Arabic-script encodings
+    """
+    block = PARAGRAPH + URDU_PARAGRAPH + ('' if urdu_only else HINDI_PARAGRAPH)
+    count = max(1, size // len(block))
+    meta = f"<meta charset=\"{charset}\">" if charset else ''
+    return (
+        f"<html><head>{meta}<title>Synthetic article</title></head><body><article>"
+        + block * count +
+        "</article></body></html>"
+    )
+
+
+def liveblog_page(posts: int = 200) -> str:
+    """A liveblog page with `posts` timestamped updates"""
+    updates = ''.join(
+        f"<div class=\"liveblog-post\"><time>{i:02d}:00</time>{PARAGRAPH}</div>" for i in range(posts)
+    )
+    return (
+        "<html><head><title>Live updates</title></head><body><header class=\"site-header\">Site</header>"
+        f"<section class=\"liveblog\">{updates}</section><aside class=\"sidebar\">Related</aside></body></html>"
+    )
+
+
+def div_soup_page(blocks: int = 3000) -> str:
+    """A large page without semantic containers, where only the generic fallbacks apply"""
+    parts = ['<html><body><nav class="menu">Menu</nav>']
+    for i in range(blocks):
+        parts.append(
+            f'<div class="wrap-{i % 50} col"><span class="meta">By staff</span>{PARAGRAPH}'
+            '<div class="share-bar">Share</div></div>'
+        )
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def pages() -> dict:
+    """Named synthetic pages covering the main extraction paths"""
+    return {
+        'article_small': article_page(5000),
+        'article_large': article_page(500000),
+        'liveblog': liveblog_page(),
+        'div_soup': div_soup_page(),
+    }
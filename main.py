@@ -1,24 +1,128 @@
+import contextvars
 import os
 import re
+import hashlib
 import logging
+import time
 import requests
-import json
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import numpy as np
 from typing import Tuple, Optional, Dict, Any, List, Union
-from flask import Flask, request, jsonify, send_from_directory, abort
+from flask import Flask, Response, g, request, jsonify, send_from_directory, abort
 from flask_cors import CORS
+from backend.fetcher import (UnsupportedContentError, configure_download, configure_page_cache, configure_retry,
+                             configure_session, fetch_page)
+from backend import metrics
+from backend.extractor import extract_article
+from backend.html_parser import parse_html
+from backend.profiling import RequestProfiler
+from backend.lexicon import LexiconMatcher, LexiconMatches
+from backend.result_cache import ResultCache
+from backend.selector_registry import DEFAULT_SELECTORS_FILE, configure_selector_registry
+from backend.strategy_memo import StrategyMemo
+from backend.structured_logging import configure_logging, new_request_id, request_id_var
+from backend.retry import CircuitOpenError
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Create Flask app and configure it
 app = Flask(__name__, static_folder='static')
 app.config['JSON_SORT_KEYS'] = False  # Preserve order in JSON responses
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # Limit request size to 5MB
+app.config['BATCH_MAX_ITEMS'] = 500  # Maximum number of articles per batch request
+app.config['BATCH_FETCH_WORKERS'] = 8  # Concurrent URL downloads per batch request
+app.config['CONFIDENCE_JITTER'] = True  # Add the ±0.03 confidence jitter, derived from the content hash
+app.config['RESULT_CACHE_SIZE'] = 10000  # Verdicts kept in process memory
+app.config['RESULT_CACHE_TTL'] = 3600  # Seconds a cached verdict stays valid
+app.config['RESULT_CACHE_DB'] = os.path.join(app.instance_path, 'result_cache.sqlite3')  # Shared by all workers, None to disable
+app.config['PAGE_CACHE_DIR'] = os.path.join(app.instance_path, 'page_cache')  # Downloaded pages, None to disable
+app.config['PAGE_CACHE_MAX_BYTES'] = 256 * 1024 * 1024  # Size bound of the page cache
+app.config['SITE_SELECTORS_FILE'] = DEFAULT_SELECTORS_FILE  # JSON registry of per-domain article selectors
+app.config['SITE_SELECTORS_RELOAD_INTERVAL'] = 5  # Seconds between checks of the registry file for edits, 0 to disable
+app.config['STRATEGY_MEMO_DB'] = os.path.join(app.instance_path, 'strategy_memo.sqlite3')  # Learned extraction strategies, None for memory only
+app.config['STRATEGY_MEMO_HALF_LIFE'] = 3 * 24 * 3600  # Seconds after which a strategy's past successes count half
+app.config['STRATEGY_MEMO_REFRESH'] = 60  # Seconds a domain's strategies are cached before other workers' learning is read
+app.config['HTTP_POOL_CONNECTIONS'] = 32  # Number of hosts with a kept-alive connection pool
+app.config['HTTP_POOL_MAXSIZE'] = 16  # Connections kept per host
+app.config['HTTP_TIMEOUT'] = (5, 15)  # (connect, read) timeout in seconds for page downloads
+app.config['PAGE_MAX_BYTES'] = 5 * 1024 * 1024  # Bytes of a page downloaded at most, the rest is skipped
+app.config['FETCH_MAX_ATTEMPTS'] = 3  # Attempts per page download, including the first one
+app.config['FETCH_DEADLINE'] = 20  # Seconds a page download may take across all attempts
+app.config['BREAKER_FAILURE_THRESHOLD'] = 5  # Consecutive failures before a host is skipped
+app.config['BREAKER_RESET_TIMEOUT'] = 30  # Seconds before a skipped host gets a trial request
+app.config['PROFILING_ENABLED'] = False  # Profile an /api/verify call that sends X-Profile or ?profile= (cprofile or collapsed)
+app.config['PROFILE_SAMPLE_EVERY'] = 0  # Profile one in this many /api/verify calls, 0 to disable
+app.config['PROFILE_DEFAULT_MODE'] = 'collapsed'  # Profile format for sampled calls: 'cprofile' (pstats) or 'collapsed' (flame graph)
+app.config['PROFILE_DIR'] = os.path.join(app.instance_path, 'profiles')  # Where profiles are written
+app.config['PROFILE_KEEP'] = 100  # Profiles kept in PROFILE_DIR, the oldest are deleted first
+app.config['LOG_LEVEL'] = 'INFO'  # Root log level; DEBUG adds the per-article scoring details
+app.config['LOG_FORMAT'] = 'json'  # 'json' for one structured record per line, 'text' for the plain layout
+app.config['LOG_SAMPLE_RATES'] = {}  # Fraction of records below WARNING kept per logger, e.g. {'backend.extractor': 0.1}
 CORS(app)  # Enable CORS for all routes
 
+# Log records are queued and written by a background thread, stamped with the request id
+configure_logging(
+    level=app.config['LOG_LEVEL'],
+    fmt=app.config['LOG_FORMAT'],
+    sample_rates=app.config['LOG_SAMPLE_RATES'],
+)
+
+# Cache of verdicts keyed on the exact article text
+if app.config['RESULT_CACHE_DB']:
+    os.makedirs(os.path.dirname(app.config['RESULT_CACHE_DB']), exist_ok=True)
+result_cache = ResultCache(
+    max_entries=app.config['RESULT_CACHE_SIZE'],
+    ttl=app.config['RESULT_CACHE_TTL'],
+    db_path=app.config['RESULT_CACHE_DB'],
+)
+metrics.counter_function(
+    'truthscan_result_cache_lookups_total', 'Verdict cache lookups by outcome',
+    lambda: {(outcome,): result_cache.stats()[key] for outcome, key in
+             (('memory_hit', 'memory_hits'), ('shared_hit', 'shared_hits'), ('miss', 'misses'))},
+    labelnames=['outcome'],
+)
+
+# Site-specific article selectors, compiled once and reloaded when the file changes
+configure_selector_registry(app.config['SITE_SELECTORS_FILE'], app.config['SITE_SELECTORS_RELOAD_INTERVAL'])
+
+# Extraction strategy that worked best on each domain, tried first on its next pages
+if app.config['STRATEGY_MEMO_DB']:
+    os.makedirs(os.path.dirname(app.config['STRATEGY_MEMO_DB']), exist_ok=True)
+strategy_memo = StrategyMemo(
+    db_path=app.config['STRATEGY_MEMO_DB'],
+    half_life=app.config['STRATEGY_MEMO_HALF_LIFE'],
+    refresh_after=app.config['STRATEGY_MEMO_REFRESH'],
+)
+
+# Opt-in and sampled profiling of verify requests
+request_profiler = RequestProfiler(
+    directory=app.config['PROFILE_DIR'],
+    on_demand=app.config['PROFILING_ENABLED'],
+    sample_every=app.config['PROFILE_SAMPLE_EVERY'],
+    keep=app.config['PROFILE_KEEP'],
+    default_mode=app.config['PROFILE_DEFAULT_MODE'],
+)
+
+# Cache of downloaded pages, revalidated with conditional requests
+configure_page_cache(app.config['PAGE_CACHE_DIR'], app.config['PAGE_CACHE_MAX_BYTES'])
+
+# Shared keep-alive session for page downloads
+configure_session(
+    pool_connections=app.config['HTTP_POOL_CONNECTIONS'],
+    pool_maxsize=app.config['HTTP_POOL_MAXSIZE'],
+    timeout=app.config['HTTP_TIMEOUT'],
+)
+configure_download(max_bytes=app.config['PAGE_MAX_BYTES'])
+
+# Retry backoff and per-host circuit breakers for page downloads
+fetch_retry_policy = configure_retry(
+    max_attempts=app.config['FETCH_MAX_ATTEMPTS'],
+    deadline=app.config['FETCH_DEADLINE'],
+    failure_threshold=app.config['BREAKER_FAILURE_THRESHOLD'],
+    reset_timeout=app.config['BREAKER_RESET_TIMEOUT'],
+)
+
 # ---- SCRAPER FUNCTIONS ----
 
 def extract_text_from_url(url: str) -> Optional[str]:
@@ -32,6 +136,8 @@ def extract_text_from_url(url: str) -> Optional[str]:
     Returns:
         Extracted text or None if extraction failed
     """
+    # Downloaded page, kept so the fallback below can reuse it
+    page = None
     try:
         # Use a realistic browser user agent to avoid being blocked
         headers = {
@@ -57,296 +163,62 @@ def extract_text_from_url(url: str) -> Optional[str]:
             domain = url.split('/')[2] if '://' in url else url.split('/')[0]
             domain = domain.lower()
         except IndexError:
-            logger.warning(f"Invalid URL format: {url}")
+            logger.warning("Invalid URL format: %s", url)
             return None
         
-        logger.info(f"Fetching content from URL: {url} (Domain: {domain})")
-        
-        # Fetch the webpage with a timeout and retry mechanism
-        max_retries = 3
-        retry_count = 0
+        logger.info("Fetching content from URL: %s (Domain: %s)", url, domain)
         
-        while retry_count < max_retries:
-            try:
-                response = requests.get(url, headers=headers, timeout=15)
-                response.raise_for_status()
-                break
-            except (requests.RequestException, requests.Timeout) as e:
-                retry_count += 1
-                if retry_count >= max_retries:
-                    logger.error(f"Failed to fetch URL after {max_retries} attempts: {str(e)}")
-                    return None
-                logger.warning(f"Retry {retry_count}/{max_retries} for URL: {url}")
-                # Wait before retrying
-                import time
-                time.sleep(1)
+        # Fetch the webpage - transient failures are retried with backoff under a
+        # total deadline, and hosts that keep failing are skipped by their circuit breaker
+        try:
+            page = fetch_page(url, headers=headers)
+        except (CircuitOpenError, UnsupportedContentError) as e:
+            logger.warning("Skipping URL, %s", e)
+            return None
+        except requests.RequestException as e:
+            logger.error("Failed to fetch URL: %s", e)
+            return None
         
         # Check if we got a valid response
-        if not response.text or len(response.text) < 100:
-            logger.warning(f"Received empty or very short response from URL: {url}")
+        html = page.body
+        if not html or len(html) < 100:
+            logger.warning("Received empty or very short response from URL: %s", url)
             return None
             
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Site-specific handling for common news websites
-        # Dictionary of domain patterns and their corresponding CSS selectors
-        site_specific_selectors = {
-            'aljazeera.com': ['.wysiwyg--all-content', '.article__body', '.article-p-wrapper'],
-            'bbc.com': ['article', '.article__body-content', '.story-body__inner'],
-            'bbc.co.uk': ['article', '.article__body-content', '.story-body__inner'],
-            'cnn.com': ['.article__content', '.article-body', '.zn-body__paragraph'],
-            'nytimes.com': ['.article-content', '.StoryBodyCompanionColumn', '.meteredContent'],
-            'washingtonpost.com': ['.article-body', '.teaser-content', '.story-body'],
-            'theguardian.com': ['.article-body-commercial-selector', '.content__article-body', '.js-article__body'],
-            'reuters.com': ['.article-body', '.StandardArticleBody_body', '.ArticleBodyWrapper'],
-            'timesofindia.indiatimes.com': ['.Normal', '._3WlLe', '.ga-article'],
-            'indiatimes.com': ['.article_content', '.article-content', '.content_text'],
-            'hindustantimes.com': ['.storyDetail', '.detail', '.story-details'],
-            'ndtv.com': ['.ins_storybody', '.story__content', '.story_details'],
-            'dawn.com': ['.story__content', '.story-content', '.story-body'],
-            'foxnews.com': ['.article-body', '.article-content', '.article-text'],
-            'news.yahoo.com': ['article', '.caas-body', '.canvas-body'],
-            'huffpost.com': ['.entry-content', '.entry__text', '.content-list-component'],
-            'usatoday.com': ['.gnt_ar_b', '.story-text', '.story-body'],
-            'wsj.com': ['.article-content', '.wsj-snippet-body', '.article_sector'],
-        }
-        
-        # Try to extract content using site-specific selectors
-        for site_pattern, selectors in site_specific_selectors.items():
-            if site_pattern in domain:
-                for selector in selectors:
-                    try:
-                        article_content = soup.select_one(selector)
-                        if article_content:
-                            # Try to get paragraphs first
-                            paragraphs = article_content.find_all('p')
-                            if paragraphs:
-                                extracted_text = ' '.join([p.get_text().strip() for p in paragraphs])
-                            else:
-                                # If no paragraphs, get all text
-                                extracted_text = article_content.get_text().strip()
-                                
-                            if len(extracted_text) > 150:
-                                logger.info(f"Used site-specific extraction for {domain} with selector {selector}")
-                                return extracted_text
-                    except Exception as e:
-                        logger.warning(f"Error with selector {selector} for {domain}: {str(e)}")
-                        continue
-        
-        # Try common article content selectors if no site-specific extraction worked
-        extracted_text = ""
-        
-        # First, try article tag
-        if not extracted_text:
-            article_tags = soup.find_all('article')
-            for article_tag in article_tags:
-                paragraphs = article_tag.find_all('p')
-                if paragraphs:
-                    extracted_text = ' '.join([p.get_text().strip() for p in paragraphs])
-                    if len(extracted_text) > 150:
-                        logger.info("Used article tag extraction")
-                        break
-                        
-        # Try main tag
-        if not extracted_text:
-            main_tag = soup.find('main')
-            if main_tag:
-                paragraphs = main_tag.find_all('p')
-                if paragraphs:
-                    extracted_text = ' '.join([p.get_text().strip() for p in paragraphs])
-                    if len(extracted_text) > 150:
-                        logger.info("Used main tag extraction")
-        
-        # Try content div with common class names
-        if not extracted_text:
-            content_classes = ['content', 'article-content', 'entry-content', 'post-content', 'story', 'article-body', 
-                              'story-content', 'news-content', 'text', 'body', 'main-content', 'page-content']
-            for class_name in content_classes:
-                content_divs = soup.find_all(['div', 'section'], class_=lambda c: c and class_name in c.lower())
-                for content_div in content_divs:
-                    paragraphs = content_div.find_all('p')
-                    if paragraphs:
-                        extracted_text = ' '.join([p.get_text().strip() for p in paragraphs])
-                        if len(extracted_text) > 150:
-                            logger.info(f"Used content div extraction with class: {class_name}")
-                            break
-                if len(extracted_text) > 150:
-                    break
-        
-        # Remove unwanted elements that typically contain non-article content
-        unwanted_tags = ['script', 'style', 'header', 'footer', 'nav', 'aside', 'iframe', 'form', 'noscript']
-        for tag in unwanted_tags:
-            for element in soup.find_all(tag):
-                element.decompose()
-        
-        # Also remove elements with class names that suggest advertisements, menus, etc.
-        ad_classes = ['ad', 'ads', 'advertisement', 'banner', 'promo', 'sidebar', 'menu', 'navigation', 'comment', 
-                     'share', 'social', 'related', 'recommended', 'newsletter', 'subscribe']
-        for class_name in ad_classes:
-            for element in soup.find_all(class_=lambda c: c and isinstance(c, str) and class_name in c.lower()):
-                element.decompose()
-        
-        # Strategy 1: Look for LiveBlog content (special case for news sites)
-        liveblog_indicators = ['liveblog', 'live-blog', 'live-updates', 'live-coverage', 'timeline']
-        for indicator in liveblog_indicators:
-            liveblog_elements = soup.find_all(class_=lambda c: c and isinstance(c, str) and indicator in c.lower())
-            if liveblog_elements:
-                logger.info(f"Detected liveblog format, applying special extraction")
-                liveblog_text = ""
-                for element in liveblog_elements:
-                    posts = element.find_all(['div', 'article', 'section'], class_=lambda c: c and isinstance(c, str) and 
-                                           any(x in c.lower() for x in ['post', 'update', 'entry', 'item']))
-                    if posts:
-                        for post in posts:
-                            post_text = ' '.join([p.get_text().strip() for p in post.find_all('p')])
-                            if post_text:
-                                liveblog_text += post_text + " "
-                
-                if len(liveblog_text) > 300:
-                    logger.info(f"Successfully extracted liveblog content: {len(liveblog_text)} chars")
-                    # Clean up the text
-                    liveblog_text = ' '.join(liveblog_text.split())
-                    return liveblog_text
-        
-        # Strategy 2: Try to find specific article containers
-        article_containers = []
-        
-        # Check for article tag
-        article_tag = soup.find('article')
-        if article_tag:
-            article_containers.append(article_tag)
-        
-        # Check for common article container classes - expanded list
-        article_classes = ['article', 'post', 'entry', 'news-content', 'story', 'content-body', 'article-body', 
-                          'story-body', 'main-content', 'page-content', 'entry-content', 'article-content',
-                          'story-content', 'news-article', 'post-content']
-        for class_name in article_classes:
-            containers = soup.find_all(class_=lambda c: c and isinstance(c, str) and class_name in c.lower())
-            article_containers.extend(containers)
-        
-        # Check for common article container IDs - expanded list
-        article_ids = ['article', 'post', 'entry', 'content', 'main-content', 'article-content', 'story-content',
-                     'page-content', 'primary-content', 'main', 'content-body', 'article-body']
-        for id_name in article_ids:
-            container = soup.find(id=lambda i: i and isinstance(i, str) and id_name in i.lower())
-            if container:
-                article_containers.append(container)
-        
-        # Try extracting text from article containers
-        extracted_text = ""
-        for container in article_containers:
-            paragraphs = container.find_all('p')
-            if paragraphs:
-                container_text = ' '.join([p.get_text().strip() for p in paragraphs])
-                if container_text and len(container_text) > len(extracted_text):
-                    extracted_text = container_text
-        
-        # Strategy 3: If no good article containers found, look for all paragraphs in the body
-        if not extracted_text or len(extracted_text) < 150:
-            # Look for paragraphs that are likely to be part of the article
-            main_content = soup.find(['main', 'div'], id=lambda i: i and isinstance(i, str) and 'content' in i.lower())
-            if main_content:
-                paragraphs = main_content.find_all('p')
-            else:
-                paragraphs = soup.find_all('p')
-                
-            if paragraphs:
-                # Filter out very short paragraphs which are likely navigation, headings etc.
-                valid_paragraphs = [p for p in paragraphs if len(p.get_text().strip()) > 20]
-                if valid_paragraphs:
-                    body_text = ' '.join([p.get_text().strip() for p in valid_paragraphs])
-                    if len(body_text) > len(extracted_text):
-                        extracted_text = body_text
-        
-        # Strategy 4: If still no good text, try div elements with substantial text content
-        if not extracted_text or len(extracted_text) < 150:
-            content_divs = []
-            for div in soup.find_all('div'):
-                div_text = div.get_text().strip()
-                if len(div_text) > 300 and div_text.count('.') > 3:  # Only divs with substantial text and multiple sentences
-                    content_divs.append(div)
-            
-            for div in content_divs:
-                div_text = div.get_text(' ', strip=True)
-                if len(div_text) > len(extracted_text):
-                    extracted_text = div_text
-        
-        # Try schema.org structured data (often used for news articles)
-        if not extracted_text:
-            article_body = soup.find('script', {'type': 'application/ld+json'})
-            if article_body:
-                try:
-                    json_data = json.loads(article_body.string)
-                    if isinstance(json_data, dict):
-                        # Check for articleBody in schema.org Article type
-                        if 'articleBody' in json_data:
-                            extracted_text = json_data['articleBody']
-                            logger.info("Used schema.org articleBody extraction")
-                        # Sometimes it's nested
-                        elif '@graph' in json_data:
-                            for item in json_data['@graph']:
-                                if isinstance(item, dict) and 'articleBody' in item:
-                                    extracted_text = item['articleBody']
-                                    logger.info("Used schema.org @graph articleBody extraction")
-                                    break
-                except (json.JSONDecodeError, AttributeError) as e:
-                    logger.warning(f"Failed to parse JSON-LD: {str(e)}")
-        
-        # Fallback: If all else fails, just get all paragraphs from the page
-        if not extracted_text:
-            # Get all text containers
-            text_containers = soup.find_all(['p', 'div', 'section', 'article', 'span'])
-            
-            # Score paragraphs based on length and position
-            scored_paragraphs = []
-            for i, container in enumerate(text_containers):
-                text = container.get_text().strip()
-                if len(text) > 30:  # Only consider paragraphs with substantial text
-                    # Score based on length (longer is better) and position (middle of page is better)
-                    length_score = min(1.0, len(text) / 200)  # Cap at 1.0
-                    position_score = 1.0 - abs((i / len(text_containers)) - 0.5) * 2  # Higher in middle
-                    score = length_score * 0.7 + position_score * 0.3
-                    scored_paragraphs.append((text, score))
-            
-            # Sort by score and take top paragraphs
-            scored_paragraphs.sort(key=lambda x: x[1], reverse=True)
-            top_paragraphs = [p[0] for p in scored_paragraphs[:min(20, len(scored_paragraphs))]]  # Take top 20 max
-            
-            if top_paragraphs:
-                extracted_text = ' '.join(top_paragraphs)
-                logger.info("Used advanced fallback paragraph extraction")
+        # Run the multi-strategy extractor over an indexed DOM, handing the
+        # parser the raw bytes and the encoding determined at download time
+        extraction = extract_article(html, domain, encoding=page.encoding, memo=strategy_memo)
         
         # Final check - do we have enough content?
-        if not extracted_text or len(extracted_text) < 150:
+        if not extraction:
             logger.warning("Failed to extract meaningful content from the URL")
             return None
-            
-            logger.info(f"Successfully extracted {len(extracted_text)} characters of text from URL")
-            return extracted_text
-        else:
-            logger.warning("Failed to extract meaningful text from the URL")
-            return None
+        
+        logger.info("Successfully extracted %d characters of text from URL using %s",
+                    len(extraction.text), extraction.strategy)
+        return extraction.text
             
     except requests.exceptions.Timeout:
-        logger.error(f"Timeout error when fetching URL: {url}")
+        logger.error("Timeout error when fetching URL: %s", url)
         return None
     except requests.exceptions.RequestException as e:
-        logger.error(f"Request error when fetching URL: {str(e)}")
+        logger.error("Request error when fetching URL: %s", e)
         return None
     except Exception as e:
-        logger.error(f"Unexpected error extracting text from URL: {str(e)}")
+        logger.error("Unexpected error extracting text from URL: %s", e)
         # Try a fallback method for extraction
         try:
-            logger.info(f"Attempting fallback extraction method for URL: {url}")
-            # Simple fallback: just get all paragraph text
-            response = requests.get(url, headers=headers, timeout=20)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            logger.info("Attempting fallback extraction method for URL: %s", url)
+            # Simple fallback: just get all paragraph text, from the page already downloaded if there is one
+            if page is None:
+                metrics.FALLBACK_REFETCHES.inc()
+                page = fetch_page(url, headers=headers, timeout=20)
+            soup = parse_html(page.body, from_encoding=page.encoding)
             paragraphs = soup.find_all('p')
             if paragraphs:
                 fallback_text = ' '.join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 15])
                 if len(fallback_text) > 100:
-                    logger.info(f"Fallback extraction successful: {len(fallback_text)} chars")
+                    logger.info("Fallback extraction successful: %d chars", len(fallback_text))
                     return fallback_text
         except Exception:
             pass
@@ -354,12 +226,159 @@ def extract_text_from_url(url: str) -> Optional[str]:
 
 # ---- DETECTOR FUNCTIONS ----
 
-def is_article_sensational(text: str) -> bool:
+# List of sensational words and phrases
+SENSATIONAL_WORDS = [
+    'shocking', 'incredible', 'unbelievable', 'mind-blowing', 'jaw-dropping',
+    'amazing', 'astonishing', 'explosive', 'bombshell', 'scandal', 'scandalous',
+    'urgent', 'emergency', 'crisis', 'breaking', 'exclusive', 'viral', 'trending',
+    'outrageous', 'controversial', 'secret', 'conspiracy', 'exposed', 'revealed',
+    'must see', 'must read', 'game-changer', 'game changer', 'changed forever',
+    'will never be the same', 'uncovered', 'leaked', 'alarming',
+    'disrupting', 'revolutionary', 'spectacular', 'hysterical',
+    'panicked', 'furious', 'dramatic', 'outraged', 'chaos', 'turmoil',
+    'nightmare', 'fatal', 'deadly', 'bizarre', 'strange', 'weird'
+]
+
+# India-Pakistan specific sensational terms
+INDIA_PAK_SENSATIONAL = [
+    'war', 'attack', 'invade', 'invasion', 'strike', 'bomb', 'threat',
+    'military action', 'troops', 'border conflict', 'secret intelligence', 'terror',
+    'terrorist attack', 'infiltration', 'espionage', 'spy caught', 'nuclear threat',
+    'weapons amassed', 'missiles targeted', 'intelligence report', 'sources claim',
+    'unconfirmed reports', 'anonymous source', 'enemy nation', 'hostile actions'
+]
+
+# List of phrases indicating reliable sourcing
+SOURCE_INDICATORS = [
+    'according to', 'sources say', 'reported by', 'cited', 'experts say',
+    'study shows', 'research indicates', 'official statement', 'confirmed by',
+    'verified by', 'press release', 'statement from', 'announced', 'declared',
+    'briefed', 'disclosed', 'revealed at press conference', 'published',
+    'speaking on condition of anonymity', 'spoke to reporters', 'told reporters',
+    'said in a statement', 'mentioned in', 'shared information'
+]
+
+# Reliable news organizations and institutions - expanded for India-Pakistan context
+RELIABLE_SOURCES = [
+    'reuters', 'associated press', 'bbc', 'afp', 'pti', 'ani', 'cnn', 
+    'al jazeera', 'the hindu', 'dawn', 'the times of india', 'the tribune',
+    'hindustan times', 'ndtv', 'india today', 'the express tribune',
+    'indian express', 'pakistan today', 'geo news', 'ary news', 'zee news',
+    'doordarshan', 'ptv', 'all india radio', 'radio pakistan',
+    'government of india', 'government of pakistan', 'prime minister',
+    'ministry of external affairs', 'ministry of foreign affairs', 'ministry of defence',
+    'indian army', 'pakistan army', 'air force', 'navy', 'ispr', 'defence ministry',
+    'foreign ministry', 'intelligence bureau', 'isi', 'raw', 'official spokesperson',
+    'defense analyst', 'security expert', 'diplomatic sources', 'university',
+    'research institute', 'think tank', 'authorities', 'officials'
+]
+
+# Indicators of balanced reporting (presence of multiple perspectives)
+BALANCED_INDICATORS = [
+    'however', 'but', 'although', 'though', 'on the other hand', 'alternatively', 
+    'in contrast', 'conversely', 'meanwhile', 'nonetheless', 'despite', 'contrary'
+]
+
+# Every lexicon above compiled into one automaton, so an article is scanned once
+RULE_LEXICON = LexiconMatcher({
+    'sensational': SENSATIONAL_WORDS,
+    'india_pak_sensational': INDIA_PAK_SENSATIONAL,
+    'source_indicators': SOURCE_INDICATORS,
+    'reliable_sources': RELIABLE_SOURCES,
+    'balanced_indicators': BALANCED_INDICATORS,
+})
+
+# Runs of two or more '!' / '?' characters
+PUNCTUATION_RUN_PATTERN = re.compile(r'[!?]{2,}')
+
+# ALL CAPS words of four or more letters
+ALL_CAPS_PATTERN = re.compile(r'\b[A-Z]{4,}\b')
+
+# Quotes (a sign of direct attribution)
+QUOTE_PATTERNS = [re.compile(r'"[^"]{10,}"'), re.compile(r"'[^']{10,}'"), re.compile(r'".*?"')]
+
+# Clickbait title patterns
+CLICKBAIT_PATTERN = re.compile(
+    r'you won\'t believe|shocking|mind[-\s]?blowing|this will make you|secret|'
+    r'they don\'t want you to know|what happens next|jaw[-\s]?dropping',
+    re.IGNORECASE
+)
+
+# Factual language (dates, statistics, specific details)
+FACT_PATTERNS = [
+    re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'),  # Date patterns
+    re.compile(r'\d+(?:\.\d+)?\s*(?:percent|%)'),  # Percentage
+    re.compile(r'according to'),  # Attribution
+    re.compile(r'\$\d+(?:\.\d+)?\s*(?:million|billion|trillion)?'),  # Money amounts
+    re.compile(r'\d+\s*(?:people|individuals|persons|citizens)'),  # Counting people
+]
+
+@dataclass
+class TextFeatures:
+    """
+    Everything the rule-based heuristics need from an article, derived once.
+
+    Build it with extract_text_features() and pass it to the heuristics instead
+    of letting each one lowercase, split and regex-scan the text again.
+    """
+    text: str
+    normalized: str  # Lowercased text
+    tokens: List[str]  # Whitespace tokens of the original text
+    word_count: int
+    caps_token_count: int  # Tokens longer than 3 characters written in ALL CAPS
+    all_caps_word_count: int  # Regex matches of ALL CAPS words
+    punctuation_runs: List[Tuple[int, int]]  # Spans of '!!', '?!?', ...
+    quote_spans: List[Tuple[int, int]]  # Spans matched by QUOTE_PATTERNS
+    has_clickbait: bool
+    fact_pattern_count: int  # Number of FACT_PATTERNS found in the text
+    lexicon: LexiconMatches
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Scalar feature vector, suitable for a JSON response"""
+        return {
+            "word_count": self.word_count,
+            "caps_token_count": self.caps_token_count,
+            "all_caps_word_count": self.all_caps_word_count,
+            "punctuation_runs": len(self.punctuation_runs),
+            "quote_count": len(self.quote_spans),
+            "has_clickbait": self.has_clickbait,
+            "fact_pattern_count": self.fact_pattern_count,
+            "lexicon_counts": self.lexicon.counts(),
+        }
+
+def extract_text_features(text: str) -> TextFeatures:
+    """
+    Compute the shared feature set for an article without producing a verdict.
+    
+    Args:
+        text: The article text
+        
+    Returns:
+        TextFeatures for the text
+    """
+    normalized = text.lower()
+    tokens = text.split()
+    return TextFeatures(
+        text=text,
+        normalized=normalized,
+        tokens=tokens,
+        word_count=len(tokens),
+        caps_token_count=sum(1 for word in tokens if len(word) > 3 and word.isupper()),
+        all_caps_word_count=len(ALL_CAPS_PATTERN.findall(text)),
+        punctuation_runs=[match.span() for match in PUNCTUATION_RUN_PATTERN.finditer(text)],
+        quote_spans=[match.span() for pattern in QUOTE_PATTERNS for match in pattern.finditer(text)],
+        has_clickbait=CLICKBAIT_PATTERN.search(text) is not None,
+        fact_pattern_count=sum(1 for pattern in FACT_PATTERNS if pattern.search(text)),
+        lexicon=RULE_LEXICON.scan(normalized),
+    )
+
+def is_article_sensational(text: str, features: Optional[TextFeatures] = None) -> bool:
     """
     Check if the article text contains sensational language.
     
     Args:
         text: The article text
+        features: Optional precomputed features for this text
         
     Returns:
         True if the article appears sensational, False otherwise
@@ -368,46 +387,24 @@ def is_article_sensational(text: str) -> bool:
     if not text or len(text) < 100:
         return False
     
-    # List of sensational words and phrases
-    sensational_words = [
-        'shocking', 'incredible', 'unbelievable', 'mind-blowing', 'jaw-dropping',
-        'amazing', 'astonishing', 'explosive', 'bombshell', 'scandal', 'scandalous',
-        'urgent', 'emergency', 'crisis', 'breaking', 'exclusive', 'viral', 'trending',
-        'outrageous', 'controversial', 'secret', 'conspiracy', 'exposed', 'revealed',
-        'must see', 'must read', 'game-changer', 'game changer', 'changed forever',
-        'will never be the same', 'uncovered', 'leaked', 'alarming',
-        'disrupting', 'revolutionary', 'spectacular', 'hysterical',
-        'panicked', 'furious', 'dramatic', 'outraged', 'chaos', 'turmoil',
-        'nightmare', 'fatal', 'deadly', 'bizarre', 'strange', 'weird'
-    ]
-    
-    # India-Pakistan specific sensational terms
-    india_pak_sensational = [
-        'war', 'attack', 'invade', 'invasion', 'strike', 'bomb', 'threat',
-        'military action', 'troops', 'border conflict', 'secret intelligence', 'terror',
-        'terrorist attack', 'infiltration', 'espionage', 'spy caught', 'nuclear threat',
-        'weapons amassed', 'missiles targeted', 'intelligence report', 'sources claim',
-        'unconfirmed reports', 'anonymous source', 'enemy nation', 'hostile actions'
-    ]
-    
-    # Count occurrences of sensational words
-    text_lower = text.lower()
+    if features is None:
+        features = extract_text_features(text)
     
     # Word count for normalization
-    word_count = len(text_lower.split())
+    word_count = features.word_count
     
     # Count sensational terms
-    basic_sensational_count = sum(1 for word in sensational_words if word in text_lower)
-    india_pak_sensational_count = sum(1 for phrase in india_pak_sensational if phrase in text_lower)
+    basic_sensational_count = features.lexicon.count('sensational')
+    india_pak_sensational_count = features.lexicon.count('india_pak_sensational')
     
     # Apply higher weight to India-Pakistan sensational terms
     total_sensational_score = basic_sensational_count + (india_pak_sensational_count * 1.5)
     
     # Check for excessive punctuation (like multiple exclamation marks)
-    excessive_punctuation = len(re.findall(r'(!|\?){2,}', text))
+    excessive_punctuation = len(features.punctuation_runs)
     
     # Check for ALL CAPS words (excluding acronyms)
-    all_caps_words = len(re.findall(r'\b[A-Z]{4,}\b', text))
+    all_caps_words = features.all_caps_word_count
     
     # Calculate total sensationalism score
     sensationalism_score = total_sensational_score + excessive_punctuation + (all_caps_words * 0.5)
@@ -424,18 +421,19 @@ def is_article_sensational(text: str) -> bool:
         threshold = max(3, word_count // 150)
     
     # Log for debugging
-    logger.debug(f"Sensationalism score: {sensationalism_score}, threshold: {threshold}, word count: {word_count}")
-    logger.debug(f"Basic sensational: {basic_sensational_count}, India-Pak sensational: {india_pak_sensational_count}")
-    logger.debug(f"Excessive punctuation: {excessive_punctuation}, All caps words: {all_caps_words}")
+    logger.debug("Sensationalism score: %s, threshold: %s, word count: %s", sensationalism_score, threshold, word_count)
+    logger.debug("Basic sensational: %s, India-Pak sensational: %s", basic_sensational_count, india_pak_sensational_count)
+    logger.debug("Excessive punctuation: %s, All caps words: %s", excessive_punctuation, all_caps_words)
     
     return sensationalism_score >= threshold
 
-def has_reliable_sources(text: str) -> bool:
+def has_reliable_sources(text: str, features: Optional[TextFeatures] = None) -> bool:
     """
     Check if the article text mentions reliable sources.
     
     Args:
         text: The article text
+        features: Optional precomputed features for this text
         
     Returns:
         True if the article mentions reliable sources, False otherwise
@@ -444,51 +442,27 @@ def has_reliable_sources(text: str) -> bool:
     if not text or len(text) < 100:
         return False
     
-    # List of phrases indicating reliable sourcing
-    source_indicators = [
-        'according to', 'sources say', 'reported by', 'cited', 'experts say',
-        'study shows', 'research indicates', 'official statement', 'confirmed by',
-        'verified by', 'press release', 'statement from', 'announced', 'declared',
-        'briefed', 'disclosed', 'revealed at press conference', 'published',
-        'speaking on condition of anonymity', 'spoke to reporters', 'told reporters',
-        'said in a statement', 'mentioned in', 'shared information'
-    ]
-    
-    # Reliable news organizations and institutions - expanded for India-Pakistan context
-    reliable_sources = [
-        'reuters', 'associated press', 'bbc', 'afp', 'pti', 'ani', 'cnn', 
-        'al jazeera', 'the hindu', 'dawn', 'the times of india', 'the tribune',
-        'hindustan times', 'ndtv', 'india today', 'the express tribune',
-        'indian express', 'pakistan today', 'geo news', 'ary news', 'zee news',
-        'doordarshan', 'ptv', 'all india radio', 'radio pakistan',
-        'government of india', 'government of pakistan', 'prime minister',
-        'ministry of external affairs', 'ministry of foreign affairs', 'ministry of defence',
-        'indian army', 'pakistan army', 'air force', 'navy', 'ispr', 'defence ministry',
-        'foreign ministry', 'intelligence bureau', 'isi', 'raw', 'official spokesperson',
-        'defense analyst', 'security expert', 'diplomatic sources', 'university',
-        'research institute', 'think tank', 'authorities', 'officials'
-    ]
-    
-    text_lower = text.lower()
+    if features is None:
+        features = extract_text_features(text)
     
     # Count source indicators
-    indicator_count = sum(1 for indicator in source_indicators if indicator in text_lower)
+    indicator_count = features.lexicon.count('source_indicators')
     
     # Count mentions of reliable sources
-    reliable_source_count = sum(1 for source in reliable_sources if source in text_lower)
+    reliable_source_count = features.lexicon.count('reliable_sources')
     
     # Check for quotes (a sign of direct attribution)
-    quote_patterns = [r'"[^"]{10,}"', r"'[^']{10,}'", r'".*?"']
-    quote_count = sum(len(re.findall(pattern, text)) for pattern in quote_patterns)
+    quote_count = len(features.quote_spans)
     
     # Calculate a reliability score based on multiple factors
     reliability_score = (indicator_count * 1.5) + (reliable_source_count * 2) + (quote_count * 1)
     
     # Log for debugging
-    logger.debug(f"Reliability score: {reliability_score}, Indicators: {indicator_count}, Sources: {reliable_source_count}, Quotes: {quote_count}")
+    logger.debug("Reliability score: %s, Indicators: %s, Sources: %s, Quotes: %s",
+                 reliability_score, indicator_count, reliable_source_count, quote_count)
     
     # Threshold based on text length
-    word_count = len(text_lower.split())
+    word_count = features.word_count
     if word_count < 300:
         threshold = 2  # Lower threshold for short texts
     else:
@@ -497,206 +471,330 @@ def has_reliable_sources(text: str) -> bool:
     # Return true if the reliability score meets or exceeds the threshold
     return reliability_score >= threshold
 
-def detect_fake_news(text: str) -> Tuple[str, float, str]:
+# Bump when the scoring rules change so cached verdicts are not reused
+SCORER_VERSION = 2
+
+def content_hash(text: str) -> str:
     """
-    Detect fake news using enhanced rule-based methods.
+    Hash of the exact article text, which keys the result cache and the confidence jitter.
+    Not normalized: the score depends on case and punctuation, so only identical texts may share a verdict.
+    """
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def verdict_cache_key(text_hash: str) -> str:
+    """Result cache key of an article: its hash, the scorer version and the settings that change the verdict"""
+    return f"{SCORER_VERSION}:{int(bool(app.config['CONFIDENCE_JITTER']))}:{text_hash}"
+
+# Indicators used by the score, in the column order of the indicator matrix
+SCORE_INDICATORS = [
+    'sensational', 'has_sources', 'very_short', 'good_length', 'has_balanced_view',
+    'has_excessive_caps', 'excessive_punct', 'has_clickbait', 'has_factual_language',
+]
+
+# Weight of each indicator in the score - positive values increase fake probability
+SCORE_WEIGHTS = np.array([
+    0.25,   # Sensational language increases fake probability
+    -0.35,  # Citing sources decreases fake probability
+    0.15,   # Very short content increases fake probability
+    -0.1,   # Good length decreases fake probability
+    -0.2,   # Balanced reporting decreases fake probability
+    0.15,   # Excessive caps increases fake probability
+    0.15,   # Excessive punctuation increases fake probability
+    0.2,    # Clickbait language increases fake probability
+    -0.25,  # Factual details decrease fake probability
+])
+
+def compute_indicators(text: str, features: TextFeatures) -> Dict[str, bool]:
+    """
+    Evaluate the boolean indicators that drive the fake news score.
     
     Args:
         text: The article text
+        features: Precomputed features for this text
         
     Returns:
-        Tuple of (result, confidence, message)
+        Dictionary mapping every name in SCORE_INDICATORS to its value
     """
-    # Sanitize input
-    if not text or len(text.strip()) < 50:
-        return "fake", 0.9, "Text is too short for reliable analysis"
-        
-    try:
+    word_count = features.word_count
+    return {
         # Check for sensational language
-        sensational = is_article_sensational(text)
-        
+        'sensational': is_article_sensational(text, features),
         # Check for reliable sources
-        has_sources = has_reliable_sources(text)
-        
+        'has_sources': has_reliable_sources(text, features),
         # Check article length (very short articles may be suspicious)
-        word_count = len(text.split())
-        very_short = word_count < 100
-        good_length = word_count > 300
-        
+        'very_short': word_count < 100,
+        'good_length': word_count > 300,
         # Check for balanced reporting (presence of multiple perspectives)
-        balanced_indicators = ['however', 'but', 'although', 'though', 'on the other hand', 'alternatively', 
-                              'in contrast', 'conversely', 'meanwhile', 'nonetheless', 'despite', 'contrary']
-        has_balanced_view = any(indicator in text.lower() for indicator in balanced_indicators)
-        
-        # Check for excessive use of ALL CAPS (common in fake news)
-        words = text.split()
-        caps_words = sum(1 for word in words if len(word) > 3 and word.isupper())
-        has_excessive_caps = (caps_words / max(1, len(words))) > 0.05  # More than 5% of words are ALL CAPS
-        
+        'has_balanced_view': features.lexicon.any('balanced_indicators'),
+        # Check for excessive use of ALL CAPS (common in fake news) - more than 5% of words
+        'has_excessive_caps': (features.caps_token_count / max(1, word_count)) > 0.05,
         # Check for excessive punctuation (!!!, ???)
-        excessive_punct = len(re.findall(r'[!?]{2,}', text)) > 2
-        
+        'excessive_punct': len(features.punctuation_runs) > 2,
         # Check for clickbait title patterns
-        clickbait_patterns = [
-            r'(?i)you won\'t believe', r'(?i)shocking', r'(?i)mind[-\s]?blowing', 
-            r'(?i)this will make you', r'(?i)secret', r'(?i)they don\'t want you to know',
-            r'(?i)what happens next', r'(?i)jaw[-\s]?dropping'
-        ]
-        has_clickbait = any(re.search(pattern, text) for pattern in clickbait_patterns)
-        
+        'has_clickbait': features.has_clickbait,
         # Check for factual language (dates, statistics, specific details)
-        fact_patterns = [
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',  # Date patterns
-            r'\d+(?:\.\d+)?\s*(?:percent|%)',  # Percentage
-            r'according to',  # Attribution
-            r'\$\d+(?:\.\d+)?\s*(?:million|billion|trillion)?',  # Money amounts
-            r'\d+\s*(?:people|individuals|persons|citizens)',  # Counting people
-        ]
-        has_factual_language = sum(1 for pattern in fact_patterns if re.search(pattern, text)) >= 2
-        
-        # Create an enhanced scoring system with more factors
-        score = 0.0
-        
-        # Core factors
-        if sensational:
-            score += 0.25  # Sensational language increases fake probability
+        'has_factual_language': features.fact_pattern_count >= 2,
+    }
+
+def score_indicators(rows: List[Dict[str, bool]]) -> np.ndarray:
+    """
+    Score many articles at once as an indicator matrix times SCORE_WEIGHTS.
+    
+    Args:
+        rows: Indicator dictionaries as returned by compute_indicators
         
-        if has_sources:
-            score -= 0.35  # Citing sources decreases fake probability
+    Returns:
+        Array with one score per row
+    """
+    matrix = np.array([[row[name] for name in SCORE_INDICATORS] for row in rows], dtype=np.float64)
+    matrix = matrix.reshape(len(rows), len(SCORE_INDICATORS))
+    # Round so the threshold comparisons below do not depend on summation order
+    return np.round(matrix @ SCORE_WEIGHTS, 6)
+
+def verdict_from_score(indicators: Dict[str, bool], score: float,
+                       text_hash: Optional[str] = None) -> Tuple[str, float, str]:
+    """
+    Turn an article's indicators and score into a verdict.
+    
+    Args:
+        indicators: Indicator dictionary as returned by compute_indicators
+        score: The article's score from score_indicators
+        text_hash: content_hash() of the article, seeds the confidence jitter
         
-        # Secondary factors
+    Returns:
+        Tuple of (result, confidence, message)
+    """
+    sensational = indicators['sensational']
+    has_sources = indicators['has_sources']
+    very_short = indicators['very_short']
+    good_length = indicators['good_length']
+    has_balanced_view = indicators['has_balanced_view']
+    has_excessive_caps = indicators['has_excessive_caps']
+    excessive_punct = indicators['excessive_punct']
+    has_clickbait = indicators['has_clickbait']
+    has_factual_language = indicators['has_factual_language']
+    
+    # Calculate a more dynamic confidence score based on the strength of indicators
+    # The more extreme the score, the higher the confidence
+    
+    # Base confidence levels are different for different categories
+    fake_base = 0.60
+    real_base = 0.60
+    uncertain_base = 0.55
+    
+    # Determine result and confidence
+    if score > 0.2:  # Threshold for fake news detection
+        result = "fake"
+        # Calculate confidence - higher score means higher confidence
+        # Use a non-linear scale to differentiate between strong and weak signals
+        confidence_boost = score * 0.35  # More impact from score
+        confidence = fake_base + confidence_boost
+        # No rounding to allow for more variation
+        
+        # Create detailed message
+        reasons = []
+        if sensational:
+            reasons.append("sensational language")
+        if has_clickbait:
+            reasons.append("clickbait-style content")
+        if not has_sources:
+            reasons.append("lack of reliable sources")
         if very_short:
-            score += 0.15  # Very short content increases fake probability
-            
-        if good_length:
-            score -= 0.1  # Good length decreases fake probability
-            
-        if has_balanced_view:
-            score -= 0.2  # Balanced reporting decreases fake probability
-            
+            reasons.append("unusually short content")
         if has_excessive_caps:
-            score += 0.15  # Excessive caps increases fake probability
-            
+            reasons.append("excessive use of capital letters")
         if excessive_punct:
-            score += 0.15  # Excessive punctuation increases fake probability
+            reasons.append("excessive punctuation")
             
-        # Additional factors
-        if has_clickbait:
-            score += 0.2  # Clickbait language increases fake probability
+        # Limit to top 3 reasons for clarity
+        if len(reasons) > 3:
+            reasons = reasons[:3]
             
+        message = f"Article likely fake due to: {', '.join(reasons)}"
+        
+    elif score < -0.2:  # Threshold for real news detection
+        result = "real"
+        # Calculate confidence - more negative score means higher confidence for real news
+        confidence_boost = abs(score) * 0.35  # More impact from score
+        confidence = real_base + confidence_boost
+        # No rounding to allow for more variation
+        
+        # Create detailed message
+        reasons = []
+        if has_sources:
+            reasons.append("cites reliable sources")
         if has_factual_language:
-            score -= 0.25  # Factual details decrease fake probability
-        
-        # Calculate a more dynamic confidence score based on the strength of indicators
-        # The more extreme the score, the higher the confidence
-        
-        # Base confidence levels are different for different categories
-        fake_base = 0.60
-        real_base = 0.60
-        uncertain_base = 0.55
-        
-        # Determine result and confidence
-        if score > 0.2:  # Threshold for fake news detection
-            result = "fake"
-            # Calculate confidence - higher score means higher confidence
-            # Use a non-linear scale to differentiate between strong and weak signals
-            confidence_boost = score * 0.35  # More impact from score
-            raw_confidence = fake_base + confidence_boost
-            # No rounding to allow for more variation
-            
-            # Create detailed message
-            reasons = []
-            if sensational:
-                reasons.append("sensational language")
-            if has_clickbait:
-                reasons.append("clickbait-style content")
-            if not has_sources:
-                reasons.append("lack of reliable sources")
-            if very_short:
-                reasons.append("unusually short content")
-            if has_excessive_caps:
-                reasons.append("excessive use of capital letters")
-            if excessive_punct:
-                reasons.append("excessive punctuation")
-                
-            # Limit to top 3 reasons for clarity
-            if len(reasons) > 3:
-                reasons = reasons[:3]
-                
-            message = f"Article likely fake due to: {', '.join(reasons)}"
-            
-        elif score < -0.2:  # Threshold for real news detection
-            result = "real"
-            # Calculate confidence - more negative score means higher confidence for real news
-            confidence_boost = abs(score) * 0.35  # More impact from score
-            raw_confidence = real_base + confidence_boost
-            # No rounding to allow for more variation
+            reasons.append("contains specific facts and data")
+        if not sensational:
+            reasons.append("uses measured language")
+        if has_balanced_view:
+            reasons.append("presents balanced perspectives")
+        if good_length:
+            reasons.append("appropriate article length")
             
-            # Create detailed message
-            reasons = []
-            if has_sources:
-                reasons.append("cites reliable sources")
-            if has_factual_language:
-                reasons.append("contains specific facts and data")
-            if not sensational:
-                reasons.append("uses measured language")
-            if has_balanced_view:
-                reasons.append("presents balanced perspectives")
-            if good_length:
-                reasons.append("appropriate article length")
-                
-            # Limit to top 3 reasons for clarity
-            if len(reasons) > 3:
-                reasons = reasons[:3]
-                
-            message = f"Article likely authentic due to: {', '.join(reasons)}"
+        # Limit to top 3 reasons for clarity
+        if len(reasons) > 3:
+            reasons = reasons[:3]
             
+        message = f"Article likely authentic due to: {', '.join(reasons)}"
+        
+    else:
+        # For borderline cases, calculate confidence based on specific indicators
+        if has_sources and has_factual_language:
+            result = "possibly real"
+            # Calculate a variable confidence based on strength of indicators
+            source_weight = 0.08 if has_sources else 0
+            factual_weight = 0.07 if has_factual_language else 0
+            balanced_weight = 0.05 if has_balanced_view else 0
+            confidence = uncertain_base + source_weight + factual_weight + balanced_weight
+            message = "Article has some indicators of reliability but exercise caution"
+        elif sensational or has_clickbait:
+            result = "possibly fake"
+            # Calculate a variable confidence based on strength of indicators
+            sensational_weight = 0.08 if sensational else 0
+            clickbait_weight = 0.07 if has_clickbait else 0
+            caps_weight = 0.05 if has_excessive_caps else 0
+            confidence = uncertain_base + sensational_weight + clickbait_weight + caps_weight
+            message = "Article has some indicators of misinformation, exercise caution"
         else:
-            # For borderline cases, calculate confidence based on specific indicators
-            if has_sources and has_factual_language:
-                result = "possibly real"
-                # Calculate a variable confidence based on strength of indicators
-                source_weight = 0.08 if has_sources else 0
-                factual_weight = 0.07 if has_factual_language else 0
-                balanced_weight = 0.05 if has_balanced_view else 0
-                confidence = uncertain_base + source_weight + factual_weight + balanced_weight
-                message = "Article has some indicators of reliability but exercise caution"
-            elif sensational or has_clickbait:
-                result = "possibly fake"
-                # Calculate a variable confidence based on strength of indicators
-                sensational_weight = 0.08 if sensational else 0
-                clickbait_weight = 0.07 if has_clickbait else 0
-                caps_weight = 0.05 if has_excessive_caps else 0
-                confidence = uncertain_base + sensational_weight + clickbait_weight + caps_weight
-                message = "Article has some indicators of misinformation, exercise caution"
-            else:
-                result = "uncertain"
-                # Truly uncertain cases get the lowest confidence
-                confidence = 0.55
-                message = "Unable to determine authenticity with high confidence"
-        
-        # Apply minimum and maximum thresholds, but with a wider range
-        # This allows for more variation in confidence scores
-        confidence = max(0.55, min(0.95, confidence))  # Between 55% and 95%
-        
-        # Add a small random factor (±0.03) to prevent identical confidence scores
-        # for slightly different inputs, while maintaining overall accuracy
-        import random
-        random_factor = (random.random() * 0.06) - 0.03  # Between -0.03 and +0.03
+            result = "uncertain"
+            # Truly uncertain cases get the lowest confidence
+            confidence = 0.55
+            message = "Unable to determine authenticity with high confidence"
+    
+    # Apply minimum and maximum thresholds, but with a wider range
+    # This allows for more variation in confidence scores
+    confidence = max(0.55, min(0.95, confidence))  # Between 55% and 95%
+    
+    # Add a small factor (±0.03) to prevent identical confidence scores
+    # for slightly different inputs, while maintaining overall accuracy.
+    # It is derived from the content hash so the same article always gets the same answer.
+    if app.config['CONFIDENCE_JITTER'] and text_hash:
+        random_factor = (int(text_hash[:8], 16) / 0xFFFFFFFF * 0.06) - 0.03  # Between -0.03 and +0.03
         confidence = max(0.55, min(0.95, confidence + random_factor))
+    
+    # Format to 2 decimal places for display
+    confidence = round(confidence * 100) / 100
+    
+    return result, confidence, message
+
+def detect_fake_news(text: str) -> Tuple[str, float, str]:
+    """
+    Detect fake news using enhanced rule-based methods.
+    
+    Args:
+        text: The article text
         
-        # Format to 2 decimal places for display
-        confidence = round(confidence * 100) / 100
+    Returns:
+        Tuple of (result, confidence, message)
+    """
+    return detect_fake_news_batch([text])[0]
+
+def detect_fake_news_batch(texts: List[str]) -> List[Tuple[str, float, str]]:
+    """
+    Detect fake news for many articles, scoring them together in one matrix product.
+    
+    Args:
+        texts: The article texts
         
-        return result, confidence, message
+    Returns:
+        List of (result, confidence, message) tuples, in the order of texts
+    """
+    started = time.perf_counter()
+    results: List[Optional[Tuple[str, float, str]]] = [None] * len(texts)
+    rows = []
+    row_positions = []
+    row_hashes = []
+    
+    for position, text in enumerate(texts):
+        # Sanitize input
+        if not text or len(text.strip()) < 50:
+            results[position] = ("fake", 0.9, "Text is too short for reliable analysis")
+            continue
         
-    except Exception as e:
-        logger.error(f"Error in fake news detection: {str(e)}")
-        # In case of any errors, return a safe default
-        return "uncertain", 0.5, "Error during analysis, unable to verify"
+        try:
+            # Reuse the verdict if this article has been scored before
+            text_hash = content_hash(text)
+            cached = result_cache.get(verdict_cache_key(text_hash))
+            if cached is not None:
+                results[position] = tuple(cached)
+                continue
+            
+            # Derive tokens, counts and lexicon matches once for every heuristic
+            features = extract_text_features(text)
+            rows.append(compute_indicators(text, features))
+            row_positions.append(position)
+            row_hashes.append(text_hash)
+        except Exception as e:
+            logger.error("Error in fake news detection: %s", e)
+            # In case of any errors, return a safe default
+            results[position] = ("uncertain", 0.5, "Error during analysis, unable to verify")
+    
+    if rows:
+        scores = score_indicators(rows)
+        for position, indicators, score, text_hash in zip(row_positions, rows, scores, row_hashes):
+            try:
+                results[position] = verdict_from_score(indicators, float(score), text_hash)
+                result_cache.set(verdict_cache_key(text_hash), results[position])
+            except Exception as e:
+                logger.error("Error in fake news detection: %s", e)
+                results[position] = ("uncertain", 0.5, "Error during analysis, unable to verify")
+    
+    metrics.SCORING_SECONDS.observe(time.perf_counter() - started, detector='rules')
+    for result in results:
+        metrics.VERDICTS.inc(result=result[0])
+    return results
 
 # ---- ROUTES ----
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    g.request_id_token = request_id_var.set(g.request_id)
+
+@app.after_request
+def observe_request(response):
+    """Time every request for the metrics, labelled with its URL rule rather than the raw path"""
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'other'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                        method=request.method, status=str(response.status_code))
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.before_request
+def start_profile():
+    # Covers the whole verify call: download, parsing, extraction and scoring
+    if request.endpoint == 'api_verify':
+        requested = request.headers.get('X-Profile') or request.args.get('profile')
+        g.profile = request_profiler.begin(requested)
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        name = request_profiler.finish(profile, label='verify')
+        if name and request_profiler.on_demand:
+            response.headers['X-Profile-File'] = name
+    return response
+
+@app.teardown_request
+def discard_profile(error):
+    # A request that failed before after_request still has to release the profiler
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop()
+
+@app.teardown_request
+def clear_request_id(error):
+    # Worker threads are reused, the next request must not inherit this id
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        request_id_var.reset(token)
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
@@ -715,7 +813,7 @@ def api_verify():
         # Log the request (sanitized to avoid logging potentially large texts)
         has_text = bool(data.get('text'))
         has_url = bool(data.get('url'))
-        logger.info(f"Received verification request - has text: {has_text}, has URL: {has_url}")
+        logger.info("Received verification request - has text: %s, has URL: %s", has_text, has_url)
         
         # Validate that at least one input type is provided
         if not has_text and not has_url:
@@ -728,23 +826,23 @@ def api_verify():
         if has_url:
             url = data.get('url')
             try:
-                logger.info(f"Attempting to extract content from URL: {url}")
+                logger.info("Attempting to extract content from URL: %s", url)
                 extracted_text = extract_text_from_url(url)
                 
                 if extracted_text:
-                    logger.info(f"Successfully extracted text from URL (Length: {len(extracted_text)} chars)")
+                    logger.info("Successfully extracted text from URL (Length: %d chars)", len(extracted_text))
                     # If we have text from URL, use it (prioritize URL over provided text)
                     text_to_analyze = extracted_text
                     
                 elif not text_to_analyze:
                     # We couldn't extract text and there's no direct text provided
-                    logger.warning(f"Failed to extract content from URL: {url}")
+                    logger.warning("Failed to extract content from URL: %s", url)
                     return jsonify({
                         "error": "Could not extract any meaningful text from the provided URL. " +
                                 "Please check that the URL points to a valid article, or paste the article text directly."
                     }), 400
             except Exception as e:
-                logger.error(f"Error processing URL ({url}): {str(e)}")
+                logger.error("Error processing URL (%s): %s", url, e)
                 
                 if not text_to_analyze:
                     # Only return an error if we have no text to fall back on
@@ -764,10 +862,10 @@ def api_verify():
         
         # Run the fake news detection
         try:
-            logger.info(f"Analyzing text for fake news detection (Length: {len(text_to_analyze)} chars)")
+            logger.info("Analyzing text for fake news detection (Length: %d chars)", len(text_to_analyze))
             result, confidence, message = detect_fake_news(text_to_analyze)
             
-            logger.info(f"Analysis complete - Result: {result}, Confidence: {confidence:.2f}")
+            logger.info("Analysis complete - Result: %s, Confidence: %.2f", result, confidence)
             return jsonify({
                 "result": result,
                 "confidence": confidence,
@@ -775,15 +873,130 @@ def api_verify():
             })
             
         except Exception as e:
-            logger.error(f"Error during fake news detection: {str(e)}")
+            logger.error("Error during fake news detection: %s", e)
             return jsonify({
                 "error": "An error occurred during content analysis. Please try again with a different article."
             }), 500
             
     except Exception as e:
-        logger.error(f"Unexpected error in verify endpoint: {str(e)}")
+        logger.error("Unexpected error in verify endpoint: %s", e)
         return jsonify({"error": "An unexpected error occurred. Please try again later."}), 500
 
+@app.route('/api/verify/batch', methods=['POST'])
+def api_verify_batch():
+    """
+    API endpoint for verifying many news articles in one request.
+
+    Expects {"items": [...]} where each item is an article text string or an
+    object with "text" and/or "url", like the body of /api/verify. Results are
+    returned in the same order, with an "error" entry for items that failed.
+    """
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            logger.warning("Invalid or missing items in batch request")
+            return jsonify({"error": "Please provide a non-empty list of items"}), 400
+        
+        max_items = app.config['BATCH_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({"error": f"A batch may contain at most {max_items} items"}), 400
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        texts: List[str] = [''] * len(items)
+        urls: Dict[int, str] = {}
+        
+        for position, item in enumerate(items):
+            if isinstance(item, str):
+                item = {"text": item}
+            if not isinstance(item, dict) or not (item.get('text') or item.get('url')):
+                results[position] = {"error": "Please provide either article text or a valid URL"}
+                continue
+            if not isinstance(item.get('text') or '', str) or not isinstance(item.get('url') or '', str):
+                results[position] = {"error": "Article text and URL must be strings"}
+                continue
+            texts[position] = item.get('text') or ''
+            if item.get('url'):
+                urls[position] = item['url']
+        
+        logger.info("Received batch verification request - items: %d, URLs: %d", len(items), len(urls))
+        
+        # Download URL items concurrently with a bounded pool
+        if urls:
+            workers = min(app.config['BATCH_FETCH_WORKERS'], len(urls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Each download runs in a copy of this request's context, so its logs keep the request id
+                futures = {position: executor.submit(contextvars.copy_context().run, extract_text_from_url, url)
+                           for position, url in urls.items()}
+                for position, future in futures.items():
+                    try:
+                        extracted_text = future.result()
+                    except Exception as e:
+                        logger.error("Error processing URL (%s): %s", urls[position], e)
+                        extracted_text = None
+                    
+                    if extracted_text:
+                        # Prioritize URL content over provided text, as /api/verify does
+                        texts[position] = extracted_text
+                    elif not texts[position]:
+                        results[position] = {"error": "Could not extract any meaningful text from the provided URL"}
+        
+        # Score every remaining item together
+        pending = [position for position, result in enumerate(results) if result is None]
+        for position in pending:
+            if len(texts[position].strip()) < 20:
+                results[position] = {"error": "The text is too short for meaningful analysis"}
+        pending = [position for position in pending if results[position] is None]
+        
+        verdicts = detect_fake_news_batch([texts[position] for position in pending])
+        for position, (result, confidence, message) in zip(pending, verdicts):
+            results[position] = {
+                "result": result,
+                "confidence": confidence,
+                "message": message
+            }
+        
+        logger.info("Batch analysis complete - scored: %d, errors: %d", len(pending), len(items) - len(pending))
+        return jsonify({"results": results})
+        
+    except Exception as e:
+        logger.error("Unexpected error in batch verify endpoint: %s", e)
+        return jsonify({"error": "An unexpected error occurred. Please try again later."}), 500
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    """Hit rate and size of the verdict cache for this worker"""
+    return jsonify(result_cache.stats())
+
+@app.route('/api/fetch/stats')
+def api_fetch_stats():
+    """Retry counters and circuit breaker state per host for this worker"""
+    return jsonify(fetch_retry_policy.stats())
+
+@app.route('/api/extract/stats')
+def api_extract_stats():
+    """Learned extraction strategy counters for this worker"""
+    return jsonify(strategy_memo.stats())
+
+@app.route('/api/profiles')
+def api_profiles():
+    """Kept profiles, newest first; only available when PROFILING_ENABLED is set"""
+    if not request_profiler.on_demand:
+        abort(404)
+    return jsonify({"profiles": request_profiler.list_profiles()})
+
+@app.route('/api/profiles/<name>')
+def api_profile(name):
+    """Download a kept profile; only available when PROFILING_ENABLED is set"""
+    if not request_profiler.on_demand:
+        abort(404)
+    return send_from_directory(request_profiler.directory, name, as_attachment=True)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Per-stage timings and counters of this worker in the Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # Serve static files from the static directory
 @app.route('/<path:path>')
 def serve_static(path):